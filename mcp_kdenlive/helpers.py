@@ -2,52 +2,426 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import inspect
+import io
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter, methodcaller
+
 from mcp.server.fastmcp import Context
 
+# D-Bus flags arrive as bools or as strings, depending on the call
+_TRUTHY = frozenset((True, "true", 1, "1", "yes", "on"))
+
+# Per-thread state: the open D-Bus batch, if any
+_tls = threading.local()
+
 
 # ---------------------------------------------------------------------------
 # Context accessors
 # ---------------------------------------------------------------------------
 
+def _new_resolve():
+    from kdenlive_api import Resolve
+
+    return Resolve()
+
+
 def get_resolve(ctx: Context):
-    """Return the Resolve singleton stored in lifespan context."""
-    return ctx.request_context.lifespan_context["resolve"]
+    """Return the Resolve singleton stored in lifespan context, connecting on first use."""
+    return _cached(ctx, "resolve", _new_resolve)
+
+
+def safe_tool(fn):
+    """Wrap a tool (sync or async) so any exception becomes an "ERROR: ..." reply."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                return f"ERROR: {e}"
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                return f"ERROR: {e}"
+    return wrapper
+
+
+def in_thread(fn):
+    """Turn a sync tool into a coroutine that runs its whole body in a worker thread.
+
+    Every D-Bus round trip of the tool, including the first connection,
+    then stays off the event loop. Apply below safe_tool.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
+
+
+def get_dbus(ctx: Context):
+    """Return the kdenlive_api D-Bus client of the Resolve singleton."""
+    return get_resolve(ctx)._dbus
+
+
+def _cached(ctx: Context, key: str, factory):
+    """Return lifespan_context[key], computing it with factory() on a miss.
+
+    None results are not cached so a missing project/timeline is re-queried.
+    """
+    cache = ctx.request_context.lifespan_context
+    value = cache.get(key)
+    if value is None:
+        value = factory()
+        cache[key] = value
+    return value
+
+
+def invalidate_ctx(ctx: Context) -> None:
+    """Drop cached Project/Timeline/MediaPool/fps handles.
+
+    Call after anything that switches project, sequence or profile.
+    """
+    cache = ctx.request_context.lifespan_context
+    for key in ("_project", "_timeline", "_media_pool", "_fps"):
+        cache[key] = None
+    _dbus_cache.clear()
 
 
 def get_project(ctx: Context):
-    """Return the current Project."""
-    return get_resolve(ctx).GetProjectManager().GetCurrentProject()
+    """Return the current Project (cached until invalidate_ctx)."""
+    return _cached(ctx, "_project",
+                   lambda: get_resolve(ctx).GetProjectManager().GetCurrentProject())
 
 
 def get_timeline(ctx: Context):
-    """Return the current Timeline."""
-    return get_project(ctx).GetCurrentTimeline()
+    """Return the current Timeline (cached until invalidate_ctx)."""
+    return _cached(ctx, "_timeline", lambda: get_project(ctx).GetCurrentTimeline())
 
 
 def get_media_pool(ctx: Context):
-    """Return the MediaPool of the current project."""
-    return get_project(ctx).GetMediaPool()
+    """Return the MediaPool of the current project (cached until invalidate_ctx)."""
+    return _cached(ctx, "_media_pool", lambda: get_project(ctx).GetMediaPool())
+
+
+def get_tracks(ctx: Context) -> list:
+    """Return GetAllTracksInfo() of the current timeline.
+
+    Not cached: tracks change through undo/redo and the Kdenlive GUI, so
+    tools fetch the list once per call and keep it in a local.
+    """
+    return get_timeline(ctx).GetAllTracksInfo()
+
+
+def first_track_ids(tracks: list) -> tuple[int | None, int | None]:
+    """Return (lowest-position video track id, first audio track id) from GetAllTracksInfo()."""
+    best_pos = best_tid = audio_id = None
+    for t in tracks:
+        if t.get("audio") in _TRUTHY:
+            if audio_id is None:
+                audio_id = int(t.get("id", t.get("track_id", 0)))
+            continue
+        tid = t.get("id", t.get("track_id"))
+        if tid is None:
+            continue
+        pos, tid = int(t.get("position", 0)), int(tid)
+        if best_tid is None or pos < best_pos or (pos == best_pos and tid < best_tid):
+            best_pos, best_tid = pos, tid
+    return best_tid, audio_id
+
+
+# ---------------------------------------------------------------------------
+# D-Bus call helpers: short-lived read cache, setter batching
+# ---------------------------------------------------------------------------
+
+_DBUS_TTL = 0.2  # seconds
+_dbus_cache: dict[tuple, tuple[float, object]] = {}
+
+
+def cached_dbus(dbus, name: str, *args, ttl: float = _DBUS_TTL):
+    """Return dbus.<name>(*args), reusing a result younger than ttl seconds.
+
+    Agents tend to re-read the same state around every edit. Entries are
+    per connection. Setters must call invalidate_cache(name, *args) on
+    success so the next read is fresh.
+    """
+    key = (id(dbus), name, args)
+    now = time.monotonic()
+    hit = _dbus_cache.get(key)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1]
+    value = getattr(dbus, name)(*args)
+    _dbus_cache[key] = (now, value)
+    return value
+
+
+def invalidate_cache(name: str | None = None, *args) -> None:
+    """Drop the cached_dbus entries for name(*args) on every connection, or all entries when name is None."""
+    if name is None:
+        _dbus_cache.clear()
+    else:
+        for key in [k for k in _dbus_cache if k[1] == name and k[2] == args]:
+            del _dbus_cache[key]
+
+
+def poll_until(fn, done=bool, timeout: float = 0.5, interval: float = 0.02,
+               backoff: float = 1.0, max_interval: float = 0.08):
+    """Call fn() until done(result) holds or timeout expires; return the last result.
+
+    Use instead of a fixed sleep after edits Kdenlive applies asynchronously:
+    returns as soon as the change is visible. With backoff > 1 the interval
+    grows geometrically (capped at max_interval), so an expensive fn is
+    called only a few times when the change never comes.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = fn()
+        remaining = deadline - time.monotonic()
+        if done(result) or remaining <= 0:
+            return result
+        time.sleep(min(interval, remaining))
+        interval = min(interval * backoff, max(max_interval, interval))
+
+
+def wait_for_new_clips(dbus, ids_before: set, timeout: float = 0.3) -> list[str]:
+    """Return bin ids that appeared since ids_before (sorted numerically), or [] on timeout.
+
+    Each poll lists the whole bin, so polls back off 10→20→40→80 ms: an
+    already-present file (no new id) costs about seven listings and no more
+    than the old fixed 0.3 s sleep.
+    """
+    new = poll_until(lambda: set(dbus.get_all_clip_ids()) - ids_before, timeout=timeout,
+                     interval=0.01, backoff=2.0)
+    return sorted(new, key=int)
+
+
+def import_clip(dbus, path: str) -> str | None:
+    """Add path to the bin and return its new bin id, or None if nothing was added.
+
+    Uses dbus.add_project_clip() when kdenlive_api returns the id directly.
+    Otherwise diffs get_all_clip_ids() around addProjectClip. The baseline is
+    listed right before the add, so an id that shows up after an earlier
+    import timed out is never attributed to this file.
+    """
+    invalidate_cache("get_all_clip_ids")
+    add_one = getattr(dbus, "add_project_clip", None)
+    if add_one is not None:
+        return add_one(path) or None
+    known = set(dbus.get_all_clip_ids())
+    dbus._call("addProjectClip", path)
+    new = wait_for_new_clips(dbus, known)
+    return new[0] if new else None
+
+
+def insert_clip(dbus, bin_id: str, track_id: int, position: int) -> tuple[int, int | None]:
+    """Insert a bin clip on the timeline; return (clip_id, duration or None).
+
+    Newer kdenlive_api returns (clip_id, duration) from insert_clip, older
+    ones just the id. clip_id is negative on failure.
+    """
+    result = dbus.insert_clip(bin_id, track_id, position)
+    if isinstance(result, (tuple, list)):
+        clip_id, dur = result
+        return int(clip_id), (None if dur is None else int(dur))
+    return int(result), None
+
+
+@contextmanager
+def undo_group(dbus, name: str):
+    """Merge the edits made inside the block into one Kdenlive undo entry.
+
+    No-op when kdenlive_api lacks begin_undo_group/end_undo_group.
+    """
+    begin = getattr(dbus, "begin_undo_group", None)
+    if begin is None:
+        yield
+        return
+    begin(name)
+    try:
+        yield
+    finally:
+        dbus.end_undo_group()
+
+
+@contextmanager
+def batch(dbus):
+    """Queue call_dbus() calls made inside the block and send them on exit.
+
+    Uses dbus.execute_batch([(method, args), ...]) when kdenlive_api provides
+    it (one round trip), otherwise replays the calls in order. Nested blocks
+    join the outer batch. Raises RuntimeError naming calls that returned a
+    falsy result, so only queue setters.
+    """
+    if getattr(_tls, "batch", None) is not None:
+        yield
+        return
+    pending = _tls.batch = []
+    try:
+        yield
+    finally:
+        _tls.batch = None
+    if not pending:
+        return
+    results = send_calls(dbus, pending)
+    failed = [name for (name, _args), ok in zip(pending, results) if not ok]
+    if failed:
+        raise RuntimeError(f"Batched call(s) failed: {', '.join(failed)}")
+
+
+def send_calls(dbus, calls: list[tuple[str, tuple]]) -> list:
+    """Send [(method, args), ...] and return the result of each call, in order.
+
+    One dbus.execute_batch() round trip when kdenlive_api provides it,
+    otherwise the calls are made one by one.
+    """
+    execute = getattr(dbus, "execute_batch", None)
+    if execute is not None:
+        return list(execute(calls))
+    return [getattr(dbus, name)(*args) for name, args in calls]
+
+
+def call_dbus(dbus, name: str, *args):
+    """Call dbus.<name>(*args), or queue it and return True inside batch()."""
+    pending = getattr(_tls, "batch", None)
+    if pending is None:
+        return getattr(dbus, name)(*args)
+    pending.append((name, args))
+    return True
+
+
+def check_i32(**values: int) -> None:
+    """Raise ValueError if any value would overflow a D-Bus int32 ('i') argument.
+
+    Lets tools reject bad ids/frames before the round trip.
+    """
+    for name, value in values.items():
+        if not -0x80000000 <= value < 0x80000000:
+            raise ValueError(f"{name} out of int32 range: {value}")
 
 
 # ---------------------------------------------------------------------------
 # Timecode formatting
 # ---------------------------------------------------------------------------
 
-def format_tc(frames: int, fps: float = 25.0) -> str:
-    """Convert frame number to HH:MM:SS:FF timecode string."""
+def _tc_parts(frames: int, fps_int: int) -> tuple[int, int, int, int]:
+    """Split a non-negative frame count into (hours, minutes, seconds, frames)."""
+    total_sec, ff = divmod(frames, fps_int)
+    total_min, s = divmod(total_sec, 60)
+    h, m = divmod(total_min, 60)
+    return h, m, s, ff
+
+
+@lru_cache(maxsize=4096)
+def _fmt_tc_cached(frames: int, fps: float) -> str:
+    # Integral rates need only integer divmods; fractional ones (29.97 etc.)
+    # and negative frames keep kdenlive_api's handling.
+    fps_int = int(fps)
+    if fps_int == fps and fps_int > 0 and frames >= 0:
+        h, m, s, ff = _tc_parts(int(frames), fps_int)
+        return f"{h:02d}:{m:02d}:{s:02d}:{ff:02d}"
     from kdenlive_api.utils import frames_to_timecode
     return frames_to_timecode(frames, fps)
 
 
+def format_tc(frames: int, fps: float = 25.0) -> str:
+    """Convert frame number to HH:MM:SS:FF timecode string.
+
+    Results are memoized per (frames, fps): the same boundaries are formatted
+    again every time the timeline summary is refreshed.
+    """
+    return _fmt_tc_cached(frames, fps)
+
+
 def get_fps(ctx: Context) -> float:
-    """Return project fps."""
-    return get_project(ctx).GetFps()
+    """Return project fps (cached until invalidate_ctx)."""
+    return _cached(ctx, "_fps", lambda: get_project(ctx).GetFps())
 
 
 # ---------------------------------------------------------------------------
 # Markdown table builders
 # ---------------------------------------------------------------------------
 
+# Header + separator of each table, joined once at import
+_CLIPS_HDR = ("| # | clip_id | start | end | dur | filename |\n"
+              "|---|---------|-------|-----|-----|----------|")
+_CLIPS_HDR_TR = ("| # | clip_id | start | end | dur | filename | transition |\n"
+                 "|---|---------|-------|-----|-----|----------|------------|")
+_MEDIA_HDR = ("| bin_id | name | type | duration_frames | duration_tc |\n"
+              "|--------|------|------|-----------------|-------------|")
+_MARKERS_HDR = ("| frame | timecode | color | label |\n"
+                "|-------|----------|-------|-------|")
+_COMPOSITIONS_HDR = ("| id | type | track_id | start | end | dur |\n"
+                     "|----|------|----------|-------|-----|-----|")
+_TRACKS_HDR = ("| track_id | type | name | clips | total_frames | mute |\n"
+               "|----------|------|------|-------|--------------|------|")
+_KEYFRAMES_HDR = ("| frame | timecode | type | value |\n"
+                  "|-------|----------|------|-------|")
+
+_itemgetter_0 = itemgetter(0)
+
+
+def _method_or(probe, name: str, default, *args):
+    """Return a getter calling item.<name>(*args) if probe has it, else one returning default.
+
+    Table inputs are homogeneous, so probing the first item once replaces a
+    hasattr() check per row.
+    """
+    if hasattr(probe, name):
+        return methodcaller(name, *args)
+    return lambda _item: default
+
+
+def _batch_fetch(items: list) -> list[dict]:
+    """Read start/end/duration/name/clip_id of TimelineItems into plain dicts.
+
+    All remote reads happen here, before any formatting, so a bulk accessor
+    in kdenlive_api can replace this loop without touching the table code.
+    """
+    if not items:
+        return []
+    probe = items[0]
+    get_start = _method_or(probe, "GetStart", 0)
+    get_end = _method_or(probe, "GetEnd", 0)
+    get_dur = _method_or(probe, "GetDuration", 0)
+    get_name = _method_or(probe, "GetName", "")
+    return [{"s": get_start(it), "e": get_end(it), "d": get_dur(it),
+             "n": get_name(it), "cid": getattr(it, "clip_id", "")} for it in items]
+
+
+def _batch_fetch_media(items: list) -> list[dict]:
+    """Read clip properties/bin_id/name/duration of MediaPoolItems into plain dicts.
+
+    items may also be clip property dicts (with id/name/duration keys) as
+    returned by a bulk D-Bus listing; those need no further reads.
+    """
+    if not items:
+        return []
+    probe = items[0]
+    if isinstance(probe, dict):
+        return [{"props": rec, "bin_id": rec.get("id", ""), "n": rec.get("name", ""),
+                 "d": int(rec.get("duration", 0))} for rec in items]
+    get_props = _method_or(probe, "GetClipProperty", None, None)
+    get_media_id = _method_or(probe, "GetMediaId", "")
+    get_name = _method_or(probe, "GetName", "")
+    get_dur = _method_or(probe, "GetDuration", 0)
+    rows = []
+    for it in items:
+        bin_id = getattr(it, "bin_id", None)
+        if bin_id is None:
+            bin_id = get_media_id(it)
+        rows.append({"props": get_props(it), "bin_id": bin_id,
+                     "n": get_name(it), "d": get_dur(it)})
+    return rows
+
+
 def clips_table(items: list, fps: float = 25.0, show_transition: bool = False) -> str:
     """Build a markdown table from a list of TimelineItem objects.
 
@@ -56,43 +430,26 @@ def clips_table(items: list, fps: float = 25.0, show_transition: bool = False) -
         |---|---------|-------|-----|-----|----------|------------|
         | 0 | 42      | ...   | ... | 125 | file.mp4 | --         |
     """
-    if show_transition:
-        header = "| # | clip_id | start | end | dur | filename | transition |"
-        sep = "|---|---------|-------|-----|-----|----------|------------|"
-    else:
-        header = "| # | clip_id | start | end | dur | filename |"
-        sep = "|---|---------|-------|-----|-----|----------|"
-
-    lines = [header, sep]
-    for i, item in enumerate(items):
-        s = item.GetStart() if hasattr(item, "GetStart") else 0
-        e = item.GetEnd() if hasattr(item, "GetEnd") else 0
-        d = item.GetDuration() if hasattr(item, "GetDuration") else 0
-        name = item.GetName() if hasattr(item, "GetName") else ""
-        cid = getattr(item, "clip_id", "")
-        row = f"| {i} | {cid} | {format_tc(s, fps)} | {format_tc(e, fps)} | {d} | {name} |"
-        if show_transition:
-            row = row[:-1] + " -- |"
-        lines.append(row)
+    lines = [_CLIPS_HDR_TR if show_transition else _CLIPS_HDR] + [None] * len(items)
+    fmt = format_tc
+    trans = " -- |" if show_transition else ""
+    for i, r in enumerate(_batch_fetch(items)):
+        lines[i + 1] = (f"| {i} | {r['cid']} | {fmt(r['s'], fps)} | {fmt(r['e'], fps)} "
+                        f"| {r['d']} | {r['n']} |{trans}")
     return "\n".join(lines)
 
 
 def media_table(items: list, fps: float = 25.0) -> str:
     """Build a markdown table from a list of MediaPoolItem objects."""
-    header = "| bin_id | name | type | duration_frames | duration_tc |"
-    sep = "|--------|------|------|-----------------|-------------|"
-    lines = [header, sep]
-    for item in items:
-        props = item.GetClipProperty(None) if hasattr(item, "GetClipProperty") else {}
-        bin_id = getattr(item, "bin_id", None)
-        if bin_id is None:
-            bin_id = item.GetMediaId() if hasattr(item, "GetMediaId") else ""
-        name = item.GetName() if hasattr(item, "GetName") else ""
-        mtype = props.get("type", "video") if isinstance(props, dict) else "video"
-        dur = item.GetDuration() if hasattr(item, "GetDuration") else 0
-        tc = format_tc(dur, fps)
-        lines.append(f"| {bin_id} | {name} | {mtype} | {dur} | {tc} |")
-    return "\n".join(lines)
+    fmt = format_tc
+    buf = io.StringIO()
+    buf.write(_MEDIA_HDR)
+    for r in _batch_fetch_media(items):
+        # GetClipProperty(None) returns a dict or None
+        mtype = (r["props"] or {}).get("type", "video")
+        dur = r["d"]
+        buf.write(f"\n| {r['bin_id']} | {r['n']} | {mtype} | {dur} | {fmt(dur, fps)} |")
+    return buf.getvalue()
 
 
 def markers_table(markers: dict, fps: float = 25.0) -> str:
@@ -100,23 +457,22 @@ def markers_table(markers: dict, fps: float = 25.0) -> str:
 
     markers is {frame: {color, duration, note, name, customData}}.
     """
-    header = "| frame | timecode | color | label |"
-    sep = "|-------|----------|-------|-------|"
-    lines = [header, sep]
-    for frame in sorted(markers.keys()):
-        info = markers[frame]
-        tc = format_tc(frame, fps)
+    fmt = format_tc
+    buf = io.StringIO()
+    buf.write(_MARKERS_HDR)
+    for frame, info in sorted(markers.items(), key=_itemgetter_0):
+        tc = fmt(frame, fps)
         color = info.get("color", "")
         label = info.get("name", "") or info.get("note", "")
-        lines.append(f"| {frame} | {tc} | {color} | {label} |")
-    return "\n".join(lines)
+        buf.write(f"\n| {frame} | {tc} | {color} | {label} |")
+    return buf.getvalue()
 
 
 def compositions_table(compositions: list, fps: float = 25.0) -> str:
     """Build a markdown table from a list of composition dicts."""
-    header = "| id | type | track_id | start | end | dur |"
-    sep = "|----|------|----------|-------|-----|-----|"
-    lines = [header, sep]
+    fmt = format_tc
+    buf = io.StringIO()
+    buf.write(_COMPOSITIONS_HDR)
     for c in compositions:
         cid = c.get("id", "")
         ctype = c.get("type", "")
@@ -124,25 +480,32 @@ def compositions_table(compositions: list, fps: float = 25.0) -> str:
         pos = int(c.get("position", 0))
         dur = int(c.get("duration", 0))
         end = pos + dur
-        start_tc = format_tc(pos, fps)
-        end_tc = format_tc(end, fps)
-        lines.append(f"| {cid} | {ctype} | {tid} | {start_tc} | {end_tc} | {dur} |")
-    return "\n".join(lines)
+        start_tc = fmt(pos, fps)
+        end_tc = fmt(end, fps)
+        buf.write(f"\n| {cid} | {ctype} | {tid} | {start_tc} | {end_tc} | {dur} |")
+    return buf.getvalue()
 
 
 def tracks_table(tracks: list) -> str:
     """Build a markdown table from GetAllTracksInfo() result."""
-    header = "| track_id | type | name | clips | total_frames | mute |"
-    sep = "|----------|------|------|-------|--------------|------|"
-    lines = [header, sep]
-    for t in tracks:
+    lines = [_TRACKS_HDR] + [None] * len(tracks)
+    for i, t in enumerate(tracks, 1):
         tid = t.get("id", t.get("track_id", ""))
-        is_audio = t.get("audio")
-        ttype = "audio" if is_audio in (True, "true") else "video"
+        ttype = "audio" if t.get("audio") in _TRUTHY else "video"
         tname = t.get("name", "")
         nclips = t.get("clips", 0)
         total = t.get("total_frames", 0)
-        mute = t.get("mute")
-        mute_str = "yes" if mute in (True, "true") else "no"
-        lines.append(f"| {tid} | {ttype} | {tname} | {nclips} | {total} | {mute_str} |")
+        mute_str = "yes" if t.get("mute") in _TRUTHY else "no"
+        lines[i] = f"| {tid} | {ttype} | {tname} | {nclips} | {total} | {mute_str} |"
+    return "\n".join(lines)
+
+
+def keyframes_table(keyframes: list, fps: float = 25.0) -> str:
+    """Build a markdown table from a list of keyframe dicts {frame, type, value}."""
+    fmt = format_tc
+    lines = [_KEYFRAMES_HDR] + [None] * len(keyframes)
+    for i, kf in enumerate(keyframes, 1):
+        frame = kf.get("frame", "")
+        tc = fmt(int(frame), fps) if frame != "" else ""
+        lines[i] = f"| {frame} | {tc} | {kf.get('type', '')} | {kf.get('value', '')} |"
     return "\n".join(lines)
@@ -2,12 +2,70 @@
 
 from __future__ import annotations
 
+import array
+import math
+import sys
+from functools import lru_cache
+
 from mcp.server.fastmcp import Context
 
+try:
+    import numpy as np
+except ImportError:  # optional: fall back to pure-Python reductions
+    np = None
+
+_fmt_level = "{:.3f}".format
+
+
+@lru_cache(maxsize=256)
+def _pan_label(pan: float) -> str:
+    """Return "center", or "left (N%)" / "right (N%)" for a -100..100 pan value."""
+    if pan == 0:
+        return "center"
+    return f"{'left' if pan < 0 else 'right'} ({abs(pan):.0f}%)"
+
+
+def _as_levels(levels):
+    """Normalize a packed little-endian float32 payload ('ay') to array.array('f').
+
+    Lists and arrays pass through unchanged.
+    """
+    if not isinstance(levels, (bytes, bytearray)):
+        return levels
+    arr = array.array("f", levels)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def _reduce_levels(levels) -> tuple[float, float]:
+    """Return (peak, average) of a level sequence.
+
+    Buffer-backed sequences (array.array from kdenlive_api) are viewed
+    without copying; lists are converted once.
+    """
+    if np is None:
+        return max(levels), sum(levels) / len(levels)
+    if hasattr(levels, "typecode"):  # array.array('f' / 'd')
+        arr = np.frombuffer(levels, dtype=levels.typecode)
+    else:
+        arr = np.asarray(levels, dtype=np.float64)
+    return float(arr.max()), float(arr.mean())
+
+
+def _merge_levels(levels, factor: int, rms: bool) -> list[float]:
+    """Merge each run of factor samples into one: its max (peak) or quadratic mean (RMS)."""
+    blocks = (levels[i:i + factor] for i in range(0, len(levels), factor))
+    if rms:
+        return [math.sqrt(sum(v * v for v in b) / len(b)) for b in blocks]
+    return [max(b) for b in blocks]
+
 
 def register(mcp, helpers):
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def set_clip_volume(ctx: Context, clip_id: int, dB: float = 0.0) -> str:
         """Set audio volume (gain) on a timeline clip.
 
@@ -15,30 +73,29 @@ def register(mcp, helpers):
             clip_id: Timeline clip ID.
             dB: Volume in decibels. 0.0 = unity (no change), -6.0 = half, +6.0 = double.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_clip_volume(clip_id, dB)
-            if not ok:
-                return f"ERROR: Could not set volume {dB} dB on clip {clip_id}"
-            return f"Set volume {dB} dB on clip {clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_clip_volume(clip_id, dB)
+        if not ok:
+            return f"ERROR: Could not set volume {dB} dB on clip {clip_id}"
+        helpers.invalidate_cache("get_clip_volume", clip_id)
+        return f"Set volume {dB} dB on clip {clip_id}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def get_clip_volume(ctx: Context, clip_id: int) -> str:
         """Get the current audio volume of a timeline clip in dB.
 
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            vol = resolve._dbus.get_clip_volume(clip_id)
-            return f"Clip {clip_id} volume: {vol} dB"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        vol = helpers.cached_dbus(dbus, "get_clip_volume", clip_id)
+        return f"Clip {clip_id} volume: {vol} dB"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def set_audio_fade(ctx: Context, clip_id: int,
                        fade_in: int = -1, fade_out: int = -1) -> str:
         """Set audio fade in/out on a timeline clip.
@@ -48,21 +105,20 @@ def register(mcp, helpers):
             fade_in: Fade-in duration in frames (-1 to skip, 0 to remove).
             fade_out: Fade-out duration in frames (-1 to skip, 0 to remove).
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_audio_fade(clip_id, fade_in, fade_out)
-            if not ok:
-                return f"ERROR: Could not set audio fade on clip {clip_id}"
-            parts = []
-            if fade_in >= 0:
-                parts.append(f"fade-in={fade_in}f")
-            if fade_out >= 0:
-                parts.append(f"fade-out={fade_out}f")
-            return f"Set audio {', '.join(parts)} on clip {clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_audio_fade(clip_id, fade_in, fade_out)
+        if not ok:
+            return f"ERROR: Could not set audio fade on clip {clip_id}"
+        parts = []
+        if fade_in >= 0:
+            parts.append(f"fade-in={fade_in}f")
+        if fade_out >= 0:
+            parts.append(f"fade-out={fade_out}f")
+        return f"Set audio {', '.join(parts)} on clip {clip_id}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def split_audio(ctx: Context, clip_id: int) -> str:
         """Separate audio from a video clip onto its own audio track.
 
@@ -72,16 +128,15 @@ def register(mcp, helpers):
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.split_audio(clip_id)
-            if not ok:
-                return f"ERROR: Could not split audio from clip {clip_id}"
-            return f"Split audio from clip {clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.split_audio(clip_id)
+        if not ok:
+            return f"ERROR: Could not split audio from clip {clip_id}"
+        return f"Split audio from clip {clip_id}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def set_track_mute(ctx: Context, track_id: int, mute: bool) -> str:
         """Mute or unmute a timeline track.
 
@@ -89,30 +144,29 @@ def register(mcp, helpers):
             track_id: Track ID.
             mute: True to mute, False to unmute.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_track_mute(track_id, mute)
-            if not ok:
-                return f"ERROR: Could not {'mute' if mute else 'unmute'} track {track_id}"
-            return f"Track {track_id} {'muted' if mute else 'unmuted'}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_track_mute(track_id, mute)
+        if not ok:
+            return f"ERROR: Could not {'mute' if mute else 'unmute'} track {track_id}"
+        helpers.invalidate_cache("get_track_mute", track_id)
+        return f"Track {track_id} {'muted' if mute else 'unmuted'}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def get_track_mute(ctx: Context, track_id: int) -> str:
         """Check if a track is muted.
 
         Args:
             track_id: Track ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            muted = resolve._dbus.get_track_mute(track_id)
-            return f"Track {track_id} is {'muted' if muted else 'not muted'}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        muted = helpers.cached_dbus(dbus, "get_track_mute", track_id)
+        return f"Track {track_id} is {'muted' if muted else 'not muted'}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def set_track_locked(ctx: Context, track_id: int, locked: bool) -> str:
         """Lock or unlock a timeline track. Locked tracks prevent editing.
 
@@ -120,30 +174,29 @@ def register(mcp, helpers):
             track_id: Track ID.
             locked: True to lock, False to unlock.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_track_locked(track_id, locked)
-            if not ok:
-                return f"ERROR: Could not {'lock' if locked else 'unlock'} track {track_id}"
-            return f"Track {track_id} {'locked' if locked else 'unlocked'}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_track_locked(track_id, locked)
+        if not ok:
+            return f"ERROR: Could not {'lock' if locked else 'unlock'} track {track_id}"
+        helpers.invalidate_cache("get_track_locked", track_id)
+        return f"Track {track_id} {'locked' if locked else 'unlocked'}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def get_track_locked(ctx: Context, track_id: int) -> str:
         """Check if a track is locked.
 
         Args:
             track_id: Track ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            locked = resolve._dbus.get_track_locked(track_id)
-            return f"Track {track_id} is {'locked' if locked else 'unlocked'}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        locked = helpers.cached_dbus(dbus, "get_track_locked", track_id)
+        return f"Track {track_id} is {'locked' if locked else 'unlocked'}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def set_track_hidden(ctx: Context, track_id: int, hidden: bool) -> str:
         """Hide or show a timeline track.
 
@@ -151,32 +204,32 @@ def register(mcp, helpers):
             track_id: Track ID.
             hidden: True to hide, False to show.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_track_hidden(track_id, hidden)
-            if not ok:
-                return f"ERROR: Could not {'hide' if hidden else 'show'} track {track_id}"
-            return f"Track {track_id} {'hidden' if hidden else 'visible'}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_track_hidden(track_id, hidden)
+        if not ok:
+            return f"ERROR: Could not {'hide' if hidden else 'show'} track {track_id}"
+        helpers.invalidate_cache("get_track_hidden", track_id)
+        return f"Track {track_id} {'hidden' if hidden else 'visible'}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def get_track_hidden(ctx: Context, track_id: int) -> str:
         """Check if a track is hidden.
 
         Args:
             track_id: Track ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            hidden = resolve._dbus.get_track_hidden(track_id)
-            return f"Track {track_id} is {'hidden' if hidden else 'visible'}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        hidden = helpers.cached_dbus(dbus, "get_track_hidden", track_id)
+        return f"Track {track_id} is {'hidden' if hidden else 'visible'}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def get_audio_levels(ctx: Context, bin_clip_id: str, stream: int = 0,
-                         downsample: int = 5, mode: str = "peak") -> str:
+                         downsample: int = 5, mode: str = "peak",
+                         max_samples: int = 0) -> str:
         """Get audio peak levels from a media pool clip as a list of normalized values (0.0-1.0).
 
         Useful for beat detection, sync, or verifying audio presence.
@@ -186,29 +239,33 @@ def register(mcp, helpers):
             stream: Audio stream index (default 0 = first stream).
             downsample: Frames per sample (1 = per-frame, 5 = every 5 frames). Higher = less data.
             mode: "peak" (default) or "rms". RMS gives smoother energy envelope, better for procedural effects.
+            max_samples: Upper bound on returned samples; adjacent samples are merged to fit. 0 = no cap.
         """
-        try:
-            mode_int = 1 if mode == "rms" else 0
-            resolve = helpers.get_resolve(ctx)
-            levels = resolve._dbus.get_audio_levels(bin_clip_id, stream, downsample, mode_int)
-            if not levels:
-                return f"No audio levels for clip {bin_clip_id} stream {stream} (audio cache may not be ready)"
-            # Summarize
-            peak = max(levels)
-            avg = sum(levels) / len(levels)
-            mode_label = mode.upper()
-            return (
-                f"Audio levels [{mode_label}] for clip {bin_clip_id} (stream {stream}, downsample {downsample}):\n"
-                f"  Samples: {len(levels)}\n"
-                f"  Peak: {peak:.3f}\n"
-                f"  Average: {avg:.3f}\n"
-                f"  Values: [{', '.join(f'{v:.3f}' for v in levels[:50])}"
-                f"{'...' if len(levels) > 50 else ''}]"
-            )
-        except Exception as e:
-            return f"ERROR: {e}"
+        mode_int = 1 if mode == "rms" else 0
+        dbus = helpers.get_dbus(ctx)
+        levels = dbus.get_audio_levels(bin_clip_id, stream, downsample, mode_int)
+        levels = _as_levels(levels)
+        if not levels:
+            return f"No audio levels for clip {bin_clip_id} stream {stream} (audio cache may not be ready)"
+        if 0 < max_samples < len(levels):
+            factor = -(-len(levels) // max_samples)
+            levels = _merge_levels(levels, factor, mode_int == 1)
+            downsample *= factor
+        # Summarize (long clips return thousands of samples)
+        peak, avg = _reduce_levels(levels)
+        mode_label = mode.upper()
+        return (
+            f"Audio levels [{mode_label}] for clip {bin_clip_id} (stream {stream}, downsample {downsample}):\n"
+            f"  Samples: {len(levels)}\n"
+            f"  Peak: {peak:.3f}\n"
+            f"  Average: {avg:.3f}\n"
+            f"  Values: [{', '.join(map(_fmt_level, levels[:50]))}"
+            f"{'...' if len(levels) > 50 else ''}]"
+        )
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def set_clip_pan(ctx: Context, clip_id: int, pan: float) -> str:
         """Set audio pan (stereo balance).
 
@@ -216,27 +273,22 @@ def register(mcp, helpers):
             clip_id: Timeline clip ID.
             pan: Pan value from -100 (full left) to +100 (full right). 0 = center.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_clip_pan(clip_id, pan)
-            if not ok:
-                return f"ERROR: Could not set pan for clip {clip_id}"
-            side = "center" if pan == 0 else f"{'left' if pan < 0 else 'right'} ({abs(pan):.0f}%)"
-            return f"Clip {clip_id} pan set to {side}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_clip_pan(clip_id, pan)
+        if not ok:
+            return f"ERROR: Could not set pan for clip {clip_id}"
+        helpers.invalidate_cache("get_clip_pan", clip_id)
+        return f"Clip {clip_id} pan set to {_pan_label(pan)}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def get_clip_pan(ctx: Context, clip_id: int) -> str:
         """Get audio pan (stereo balance) of a clip.
 
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            pan = resolve._dbus.get_clip_pan(clip_id)
-            side = "center" if pan == 0 else f"{'left' if pan < 0 else 'right'} ({abs(pan):.0f}%)"
-            return f"Clip {clip_id} pan: {side} ({pan:+.0f})"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        pan = helpers.cached_dbus(dbus, "get_clip_pan", clip_id)
+        return f"Clip {clip_id} pan: {_pan_label(pan)} ({pan:+.0f})"
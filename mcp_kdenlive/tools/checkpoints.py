@@ -2,19 +2,68 @@
 
 from __future__ import annotations
 
+import json
 import os
+import shutil
 import time
+from collections import OrderedDict
 
 from mcp.server.fastmcp import Context
 
 
-# In-process checkpoint registry: {label: file_path}
-_checkpoints: dict[str, str] = {}
+# Checkpoint registry: {project_path: {label: file_path}}, most recent last
+# per project. Mirrored to _REGISTRY_PATH so checkpoint files are not
+# orphaned by a server restart.
+_checkpoints: dict[str, OrderedDict[str, str]] = {}
+_REGISTRY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mcp-kdenlive",
+                              "checkpoints.json")
+
+
+def _load_registry() -> None:
+    try:
+        with open(_REGISTRY_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if not isinstance(data, dict):
+        return
+    for project, entries in data.items():
+        if not isinstance(entries, dict):
+            continue
+        # Checkpoint files deleted since the last run are dropped
+        live = OrderedDict((label, path) for label, path in entries.items()
+                           if isinstance(path, str) and os.path.exists(path))
+        if live:
+            _checkpoints[project] = live
+
+
+def _save_registry() -> None:
+    try:
+        os.makedirs(os.path.dirname(_REGISTRY_PATH), exist_ok=True)
+        with open(_REGISTRY_PATH, "w", encoding="utf-8") as f:
+            json.dump(_checkpoints, f, indent=1)
+    except OSError:
+        pass  # the checkpoint file itself exists; only restart recovery is lost
+
+
+def _owner(project_path: str) -> str:
+    """Return the project a path belongs to: itself, or the project it is a checkpoint of.
+
+    After checkpoint_restore the open project is the checkpoint file, whose
+    checkpoints are still the original project's.
+    """
+    for project, entries in _checkpoints.items():
+        if project_path in entries.values():
+            return project
+    return project_path
 
 
 def register(mcp, helpers):
+    _load_registry()
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def checkpoint_save(ctx: Context, label: str = "") -> str:
         """Save a checkpoint of the current project state.
 
@@ -23,135 +72,135 @@ def register(mcp, helpers):
         Args:
             label: Optional label for the checkpoint. Auto-generated if empty.
         """
-        try:
-            proj = helpers.get_project(ctx)
-            orig_path = proj.GetProjectPath()
-            if not orig_path:
-                return "ERROR: Project has no path — save it first."
+        proj = helpers.get_project(ctx)
+        orig_path = proj.GetProjectPath()
+        if not orig_path:
+            return "ERROR: Project has no path — save it first."
 
-            if not label:
-                label = f"ckpt-{int(time.time())}"
+        if not label:
+            label = f"ckpt-{int(time.time())}"
 
-            base, ext = os.path.splitext(orig_path)
-            ckpt_path = f"{base}__{label}{ext}"
+        base, ext = os.path.splitext(orig_path)
+        ckpt_path = f"{base}__{label}{ext}"
 
-            ok = proj.SaveAs(ckpt_path)
-            if not ok:
-                return f"ERROR: Could not save checkpoint to {ckpt_path}"
+        # Serialize once in place, then copy the file — a second SaveAs
+        # would push the whole project XML through D-Bus again.
+        if not proj.Save():
+            return f"ERROR: Could not save project to {orig_path}"
+        shutil.copy2(orig_path, ckpt_path)
 
-            # Re-save back to original path so we continue working on original
-            proj.SaveAs(orig_path)
-
-            _checkpoints[label] = ckpt_path
-            return f"Checkpoint saved: {ckpt_path}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        entries = _checkpoints.setdefault(_owner(orig_path), OrderedDict())
+        entries[label] = ckpt_path
+        entries.move_to_end(label)
+        _save_registry()
+        return f"Checkpoint saved: {ckpt_path}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def checkpoint_restore(ctx: Context, label: str = "") -> str:
         """Restore a previously saved checkpoint.
 
         Args:
             label: Checkpoint label to restore. If empty, restores the most recent.
         """
-        try:
-            if not _checkpoints:
-                return "ERROR: No checkpoints available."
-
-            if label:
-                ckpt_path = _checkpoints.get(label)
-                if not ckpt_path:
-                    available = ", ".join(_checkpoints.keys())
-                    return f"ERROR: Checkpoint '{label}' not found. Available: {available}"
-            else:
-                # Most recent
-                label = list(_checkpoints.keys())[-1]
-                ckpt_path = _checkpoints[label]
-
-            if not os.path.exists(ckpt_path):
-                return f"ERROR: Checkpoint file missing: {ckpt_path}"
-
-            resolve = helpers.get_resolve(ctx)
-            pm = resolve.GetProjectManager()
-            proj = pm.LoadProject(ckpt_path)
-            if proj is None:
-                return f"ERROR: Could not load checkpoint {ckpt_path}"
-
-            return f"Restored checkpoint '{label}' from {ckpt_path}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        project = _owner(helpers.get_project(ctx).GetProjectPath() or "")
+        entries = _checkpoints.get(project)
+        if not entries:
+            return "ERROR: No checkpoints available for this project."
+
+        if label:
+            ckpt_path = entries.get(label)
+            if not ckpt_path:
+                available = ", ".join(entries.keys())
+                return f"ERROR: Checkpoint '{label}' not found. Available: {available}"
+        else:
+            # Most recent
+            label = next(reversed(entries))
+            ckpt_path = entries[label]
+
+        if not os.path.exists(ckpt_path):
+            return f"ERROR: Checkpoint file missing: {ckpt_path}"
+
+        resolve = helpers.get_resolve(ctx)
+        pm = resolve.GetProjectManager()
+        proj = pm.LoadProject(ckpt_path)
+        helpers.invalidate_ctx(ctx)
+        if proj is None:
+            return f"ERROR: Could not load checkpoint {ckpt_path}"
+
+        return f"Restored checkpoint '{label}' from {ckpt_path}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def undo(ctx: Context, steps: int = 1) -> str:
         """Undo the last operation(s) in Kdenlive.
 
         Args:
             steps: Number of operations to undo (default 1).
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.undo(steps)
-            if ok:
-                status = resolve._dbus.undo_status()
-                undo_text = status.get("undo_text", "")
-                idx = status.get("index", "?")
-                count = status.get("count", "?")
-                msg = f"Undid {steps} operation(s). Stack position: {idx}/{count}."
-                if undo_text:
-                    msg += f" Next undo: \"{undo_text}\""
-                return msg
-            return "Nothing to undo."
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.undo(steps)
+        if ok:
+            helpers.invalidate_cache()  # cached reads may predate the reverted edits
+            status = dbus.undo_status()
+            undo_text = status.get("undo_text", "")
+            idx = status.get("index", "?")
+            count = status.get("count", "?")
+            msg = f"Undid {steps} operation(s). Stack position: {idx}/{count}."
+            if undo_text:
+                msg += f" Next undo: \"{undo_text}\""
+            return msg
+        return "Nothing to undo."
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def redo(ctx: Context, steps: int = 1) -> str:
         """Redo previously undone operation(s) in Kdenlive.
 
         Args:
             steps: Number of operations to redo (default 1).
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.redo(steps)
-            if ok:
-                status = resolve._dbus.undo_status()
-                redo_text = status.get("redo_text", "")
-                idx = status.get("index", "?")
-                count = status.get("count", "?")
-                msg = f"Redid {steps} operation(s). Stack position: {idx}/{count}."
-                if redo_text:
-                    msg += f" Next redo: \"{redo_text}\""
-                return msg
-            return "Nothing to redo."
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.redo(steps)
+        if ok:
+            helpers.invalidate_cache()  # cached reads may predate the reverted edits
+            status = dbus.undo_status()
+            redo_text = status.get("redo_text", "")
+            idx = status.get("index", "?")
+            count = status.get("count", "?")
+            msg = f"Redid {steps} operation(s). Stack position: {idx}/{count}."
+            if redo_text:
+                msg += f" Next redo: \"{redo_text}\""
+            return msg
+        return "Nothing to redo."
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def undo_status(ctx: Context) -> str:
         """Show current undo/redo status: what can be undone/redone and stack depth."""
-        try:
-            resolve = helpers.get_resolve(ctx)
-            status = resolve._dbus.undo_status()
-            if not status:
-                return "No undo stack available."
-
-            can_undo = status.get("can_undo", "false")
-            can_redo = status.get("can_redo", "false")
-            undo_text = status.get("undo_text", "")
-            redo_text = status.get("redo_text", "")
-            idx = status.get("index", "0")
-            count = status.get("count", "0")
-
-            lines = [f"Stack position: {idx}/{count}"]
-            if can_undo == "true":
-                lines.append(f"Can undo: \"{undo_text}\"")
-            else:
-                lines.append("Can undo: no")
-            if can_redo == "true":
-                lines.append(f"Can redo: \"{redo_text}\"")
-            else:
-                lines.append("Can redo: no")
-            return "\n".join(lines)
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        status = dbus.undo_status()
+        if not status:
+            return "No undo stack available."
+
+        can_undo = status.get("can_undo", "false")
+        can_redo = status.get("can_redo", "false")
+        undo_text = status.get("undo_text", "")
+        redo_text = status.get("redo_text", "")
+        idx = status.get("index", "0")
+        count = status.get("count", "0")
+
+        lines = [f"Stack position: {idx}/{count}"]
+        if can_undo == "true":
+            lines.append(f"Can undo: \"{undo_text}\"")
+        else:
+            lines.append("Can undo: no")
+        if can_redo == "true":
+            lines.append(f"Can redo: \"{redo_text}\"")
+        else:
+            lines.append("Can redo: no")
+        return "\n".join(lines)
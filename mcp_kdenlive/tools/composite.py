@@ -6,12 +6,36 @@ saving the agent 10-50 roundtrips per workflow.
 
 from __future__ import annotations
 
+import fnmatch
 import glob
 import os
-import re
 
 from mcp.server.fastmcp import Context
 
+_SCENES_TABLE_HEADER = "| # | Time (s) | Timecode |\n|---|----------|----------|"
+
+
+def _match_files(directory: str, pattern: str) -> list[tuple[str, str]]:
+    """Return sorted (name, path) pairs of files in directory matching a glob pattern.
+
+    One scandir pass; names come from the directory entries, so callers need
+    no os.path.basename. Patterns with a path separator go through glob.
+    A missing directory matches nothing, as it does for glob.
+    """
+    directory = os.path.abspath(directory)
+    if not os.path.isdir(directory):
+        return []
+    if os.sep in pattern or "/" in pattern:
+        return [(os.path.basename(p), p)
+                for p in sorted(glob.glob(os.path.join(directory, pattern)))]
+    hidden_ok = pattern.startswith(".")  # glob skips dotfiles unless asked
+    with os.scandir(directory) as it:
+        entries = [(e.name, e.path) for e in it
+                   if (hidden_ok or not e.name.startswith("."))
+                   and fnmatch.fnmatch(e.name, pattern) and e.is_file()]
+    entries.sort()
+    return entries
+
 
 def register(mcp, helpers):
 
@@ -37,41 +61,37 @@ def register(mcp, helpers):
             transition_frames: Cross-dissolve duration in frames (default 13 ~ 0.5s at 25fps).
             folder_name: Media pool folder name for imported clips (default "scenes").
         """
-        import time
-        import glob as globmod
-
         try:
             resolve = helpers.get_resolve(ctx)
-            tl = helpers.get_timeline(ctx)
-            fps = helpers.get_fps(ctx)
             dbus = resolve._dbus
             log: list[str] = []
 
             # ── Phase 1: Import to media pool ──────────────────────────
-            full_pattern = os.path.join(os.path.abspath(video_dir), pattern)
-            files = sorted(globmod.glob(full_pattern))
-            if not files:
+            entries = _match_files(video_dir, pattern)
+            if not entries:
                 return f"ERROR: No files matched '{pattern}' in {video_dir}"
+            names = [n for n, _ in entries]
+            files = [p for _, p in entries]
 
-            # Import one by one, track which succeeded
+            # Import, tracking which files produced a new bin clip
             imported: list[tuple[str, str]] = []  # (filename, bin_id)
             already_present: list[str] = []
-            for f in files:
-                ids_before = set(dbus.get_all_clip_ids())
-                dbus._call("addProjectClip", f)
-                time.sleep(0.3)
-                ids_after = set(dbus.get_all_clip_ids())
-                new = ids_after - ids_before
-                if new:
-                    bid = sorted(new, key=int)[0]
-                    imported.append((os.path.basename(f), bid))
+            add_many = getattr(dbus, "add_project_clips", None)
+            if add_many is not None:
+                # Bulk import: one round trip, bin ids in file order ("" = not added)
+                bin_ids = add_many(files)
+                helpers.invalidate_cache("get_all_clip_ids")
+            else:
+                bin_ids = [helpers.import_clip(dbus, f) for f in files]
+            for name, bid in zip(names, bin_ids):
+                if bid:
+                    imported.append((name, bid))
                 else:
-                    already_present.append(os.path.basename(f))
+                    already_present.append(name)
 
             if imported:
                 log.append(f"**Import:** {len(imported)} new clips added")
-                for name, bid in imported:
-                    log.append(f"  {name} → bin_id {bid}")
+                log.extend(f"  {name} → bin_id {bid}" for name, bid in imported)
             if already_present:
                 log.append(f"**Already in bin:** {', '.join(already_present)}")
 
@@ -82,81 +102,68 @@ def register(mcp, helpers):
                 if not bin_ids:
                     return "ERROR: No media clips in bin."
                 log.append(f"**Using existing bin clips:** {bin_ids}")
-                imported = [(os.path.basename(files[i]) if i < len(files) else f"clip-{bid}",
-                            bid) for i, bid in enumerate(bin_ids)]
+                imported = list(zip(names, bin_ids))
+                imported += [(f"clip-{bid}", bid) for bid in bin_ids[len(names):]]
 
             if not imported:
                 return "\n".join(log) + "\nERROR: No clips available."
 
             # ── Phase 2: Assemble timeline ─────────────────────────────
-            # Find the first (lowest-position) video track
-            tracks = tl.GetAllTracksInfo()
-            video_track_id = None
-            video_tracks = []
-            for t in tracks:
-                is_audio = t.get("audio")
-                if is_audio in (True, "true"):
-                    continue
-                tid = t.get("id", t.get("track_id"))
-                pos = t.get("position", 0)
-                if tid is not None:
-                    video_tracks.append((int(pos), int(tid), t.get("name", "")))
-            if video_tracks:
-                video_tracks.sort()
-                video_track_id = video_tracks[0][1]
-            if video_track_id is None:
-                video_track_id = dbus.add_track("V1", False)
-
-            log.append(f"**Target track:** id={video_track_id}")
-
-            # Insert clips one by one, get duration from timeline clip info
-            tl_clip_ids = []
-            position = 0
-            for name, bid in imported:
-                clip_id = dbus.insert_clip(bid, video_track_id, position)
-                if clip_id < 0:
-                    log.append(f"  SKIP {name}: insert failed")
-                    continue
-                tl_clip_ids.append(clip_id)
-                time.sleep(0.2)
-                info = dbus.get_timeline_clip_info(clip_id)
-                dur = int(info.get("duration", 0)) if info else 0
-                position += dur if dur > 0 else 125
-                log.append(f"  {name} → clip_id {clip_id}, {dur}f at pos {position - (dur if dur > 0 else 125)}")
-
-            if not tl_clip_ids:
-                return "\n".join(log) + "\nERROR: No clips placed on timeline."
-            log.append(f"**Sequenced:** {len(tl_clip_ids)} clips on track {video_track_id}")
-
-            # Transitions
-            if transition_frames > 0 and len(tl_clip_ids) >= 2:
-                t_count = 0
-                for i in range(len(tl_clip_ids) - 1):
-                    ok = dbus.add_mix(tl_clip_ids[i], tl_clip_ids[i + 1],
-                                      transition_frames)
-                    if ok:
-                        t_count += 1
-                log.append(f"**Transitions:** {t_count} dissolves ({transition_frames}f each)")
-
-            # Audio
-            if audio_path:
-                audio_ids_before = set(dbus.get_all_clip_ids())
-                dbus._call("addProjectClip", audio_path)
-                time.sleep(0.3)
-                audio_ids_after = set(dbus.get_all_clip_ids())
-                new_audio = sorted(audio_ids_after - audio_ids_before, key=int)
-                if new_audio:
-                    audio_track_id = None
-                    for t in tracks:
-                        if t.get("audio") in (True, "true"):
-                            audio_track_id = int(t.get("id", t.get("track_id", 0)))
-                            break
-                    if audio_track_id is None:
-                        audio_track_id = dbus.add_track("A1", True)
-                    dbus.insert_clip(new_audio[0], audio_track_id, 0)
-                    log.append(f"**Audio:** {os.path.basename(audio_path)}")
-                else:
-                    log.append(f"**Audio:** FAILED to import {audio_path}")
+            # One undo entry for the whole assembly (if Kdenlive supports macros)
+            with helpers.undo_group(dbus, "Build timeline"):
+                # Find the first (lowest-position) video track
+                video_track_id, audio_track_id = helpers.first_track_ids(helpers.get_tracks(ctx))
+                if video_track_id is None:
+                    video_track_id = dbus.add_track("V1", False)
+
+                log.append(f"**Target track:** id={video_track_id}")
+
+                # Insert clips one by one, get duration from timeline clip info
+                tl_clip_ids = []
+                position = 0
+                for name, bid in imported:
+                    clip_id, dur = helpers.insert_clip(dbus, bid, video_track_id, position)
+                    if clip_id < 0:
+                        log.append(f"  SKIP {name}: insert failed")
+                        continue
+                    tl_clip_ids.append(clip_id)
+                    if dur is None:
+                        info = helpers.poll_until(lambda: dbus.get_timeline_clip_info(clip_id),
+                                                  done=lambda i: i and int(i.get("duration", 0)) > 0,
+                                                  timeout=0.2)
+                        dur = info.get("duration", 0) if info else 0
+                    dur = int(dur)
+                    log.append(f"  {name} → clip_id {clip_id}, {dur}f at pos {position}")
+                    position += dur if dur > 0 else 125
+
+                if not tl_clip_ids:
+                    return "\n".join(log) + "\nERROR: No clips placed on timeline."
+                log.append(f"**Sequenced:** {len(tl_clip_ids)} clips on track {video_track_id}")
+
+                # Transitions
+                if transition_frames > 0 and len(tl_clip_ids) >= 2:
+                    mixes = [(a, b, transition_frames) for a, b in zip(tl_clip_ids, tl_clip_ids[1:])]
+                    add_mixes = getattr(dbus, "add_mixes", None)
+                    if add_mixes is not None:
+                        # Bulk: one round trip, returns the number of mixes created
+                        t_count = add_mixes(mixes)
+                    else:
+                        t_count = sum(1 for a, b, n in mixes if dbus.add_mix(a, b, n))
+                    log.append(f"**Transitions:** {t_count} dissolves ({transition_frames}f each)")
+
+                # Audio
+                if audio_path:
+                    audio_bin_id = helpers.import_clip(dbus, audio_path)
+                    if audio_bin_id:
+                        if audio_track_id is None:
+                            audio_track_id = dbus.add_track("A1", True)
+                        audio_clip_id, _ = helpers.insert_clip(dbus, audio_bin_id, audio_track_id, 0)
+                        if audio_clip_id < 0:
+                            log.append(f"**Audio:** FAILED to insert {os.path.basename(audio_path)}")
+                        else:
+                            log.append(f"**Audio:** {os.path.basename(audio_path)}")
+                    else:
+                        log.append(f"**Audio:** FAILED to import {audio_path}")
 
             return "\n".join(log)
         except Exception as e:
@@ -174,28 +181,13 @@ def register(mcp, helpers):
             scene_number: Scene number (1-based, e.g. 1-38).
             new_file: Absolute path to the replacement video file.
         """
-        import time
-
         try:
             resolve = helpers.get_resolve(ctx)
-            tl = helpers.get_timeline(ctx)
             fps = helpers.get_fps(ctx)
             dbus = resolve._dbus
 
             # Find first video track (lowest position, non-audio)
-            tracks = tl.GetAllTracksInfo()
-            video_track_id = None
-            video_tracks = []
-            for t in tracks:
-                if t.get("audio") in (True, "true"):
-                    continue
-                tid = t.get("id", t.get("track_id"))
-                pos = t.get("position", 0)
-                if tid is not None:
-                    video_tracks.append((int(pos), int(tid)))
-            if video_tracks:
-                video_tracks.sort()
-                video_track_id = video_tracks[0][1]
+            video_track_id, _ = helpers.first_track_ids(helpers.get_tracks(ctx))
             if video_track_id is None:
                 return "ERROR: No video track found."
 
@@ -216,26 +208,22 @@ def register(mcp, helpers):
             old_name = old_info.get("name", f"clip-{old_clip_id}") if old_info else f"clip-{old_clip_id}"
 
             # Import new file
-            ids_before = set(dbus.get_all_clip_ids())
-            dbus._call("addProjectClip", new_file)
-            time.sleep(0.3)
-            ids_after = set(dbus.get_all_clip_ids())
-            new_ids = ids_after - ids_before
-            if not new_ids:
+            new_bin_id = helpers.import_clip(dbus, new_file)
+            if not new_bin_id:
                 return f"ERROR: Could not import {new_file}"
-            new_bin_id = sorted(new_ids, key=int)[0]
 
-            # Delete old clip
-            dbus.delete_timeline_clip(old_clip_id)
+            with helpers.undo_group(dbus, f"Replace scene {scene_number}"):
+                # Delete old clip
+                dbus.delete_timeline_clip(old_clip_id)
 
-            # Insert new clip at same position
-            new_clip_id = dbus.insert_clip(new_bin_id, video_track_id, old_start)
-            if new_clip_id < 0:
-                return f"ERROR: Deleted scene {scene_number} but failed to insert replacement."
+                # Insert new clip at same position
+                new_clip_id, _ = helpers.insert_clip(dbus, new_bin_id, video_track_id, old_start)
+                if new_clip_id < 0:
+                    return f"ERROR: Deleted scene {scene_number} but failed to insert replacement."
 
-            # Match duration
-            if old_dur > 0:
-                dbus.resize_clip(new_clip_id, old_dur, True)
+                # Match duration
+                if old_dur > 0:
+                    dbus.resize_clip(new_clip_id, old_dur, True)
 
             tc = helpers.format_tc(old_start, fps)
             return (
@@ -271,16 +259,13 @@ def register(mcp, helpers):
             if not timestamps:
                 return f"No scene cuts detected in clip {bin_clip_id} (threshold={threshold})."
 
-            lines = [
-                f"**Scene detection:** {len(timestamps)} cuts found in clip {bin_clip_id} (threshold={threshold})",
-                "",
-                "| # | Time (s) | Timecode |",
-                "|---|----------|----------|",
-            ]
-            for i, t in enumerate(timestamps, 1):
-                tc = helpers.format_tc(int(round(t * fps)), fps)
-                lines.append(f"| {i} | {t:.3f} | {tc} |")
-
-            return "\n".join(lines)
+            rows = "\n".join(
+                f"| {i} | {t:.3f} | {helpers.format_tc(int(round(t * fps)), fps)} |"
+                for i, t in enumerate(timestamps, 1)
+            )
+            return (
+                f"**Scene detection:** {len(timestamps)} cuts found in clip {bin_clip_id} (threshold={threshold})\n"
+                f"\n{_SCENES_TABLE_HEADER}\n{rows}"
+            )
         except Exception as e:
             return f"ERROR: {e}"
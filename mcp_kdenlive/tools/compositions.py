@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from mcp.server.fastmcp import Context
 
+_TYPES_TABLE_HEADER = "| id | name |\n|----|------|"
+
 
 def register(mcp, helpers):
 
@@ -115,9 +117,7 @@ def register(mcp, helpers):
             types = resolve._dbus.get_composition_types()
             if not types:
                 return "No composition types found."
-            header = "| id | name |"
-            sep = "|----|------|"
-            lines = [header, sep]
+            lines = [_TYPES_TABLE_HEADER]
             for t in types:
                 tid = t.get("id", "")
                 tname = t.get("name", "")
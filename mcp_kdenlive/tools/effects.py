@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
+import io
+from operator import itemgetter
+
 from mcp.server.fastmcp import Context
 
+_EFFECT_TYPES = frozenset(("video", "audio", "all"))
+
 
 def register(mcp, helpers):
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_available_effects(ctx: Context, effect_type: str = "all") -> str:
         """List all available effects in Kdenlive.
 
@@ -16,21 +22,22 @@ def register(mcp, helpers):
 
         Returns a markdown table: id | name | type
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            effects = resolve._dbus.get_available_effects()
-            if not effects:
-                return "No effects found."
-            if effect_type != "all":
-                effects = [e for e in effects if e.get("type") == effect_type]
-            lines = ["| id | name | type |", "|-----|------|------|"]
-            for e in effects:
-                lines.append(f"| {e.get('id', '')} | {e.get('name', '')} | {e.get('type', '')} |")
-            return f"{len(effects)} effects:\n\n" + "\n".join(lines)
-        except Exception as e:
-            return f"ERROR: {e}"
+        if effect_type not in _EFFECT_TYPES:
+            return f"ERROR: effect_type must be video, audio or all (got {effect_type!r})"
+        dbus = helpers.get_dbus(ctx)
+        effects = dbus.get_available_effects()
+        if not effects:
+            return "No effects found."
+        if effect_type != "all":
+            effects = [e for e in effects if e.get("type") == effect_type]
+        buf = io.StringIO()
+        buf.write(f"{len(effects)} effects:\n\n| id | name | type |\n|-----|------|------|")
+        for e in effects:
+            buf.write(f"\n| {e.get('id', '')} | {e.get('name', '')} | {e.get('type', '')} |")
+        return buf.getvalue()
 
     @mcp.tool()
+    @helpers.safe_tool
     def add_effect(ctx: Context, clip_id: int, effect_id: str,
                    params: dict[str, str] | None = None) -> str:
         """Add an effect/filter to a timeline clip with optional parameters.
@@ -42,19 +49,17 @@ def register(mcp, helpers):
             effect_id: MLT effect ID (e.g. "qtblend", "affine", "brightness").
             params: Optional parameter dict (key=value pairs).
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.add_clip_effect(clip_id, effect_id, params)
-            if not ok:
-                return f"ERROR: Could not add effect '{effect_id}' to clip {clip_id}"
-            param_str = ""
-            if params:
-                param_str = " with " + ", ".join(f"{k}={v}" for k, v in params.items())
-            return f"Added effect '{effect_id}' to clip {clip_id}{param_str}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.add_clip_effect(clip_id, effect_id, params)
+        if not ok:
+            return f"ERROR: Could not add effect '{effect_id}' to clip {clip_id}"
+        if not params:
+            return f"Added effect '{effect_id}' to clip {clip_id}"
+        # params is dict[str, str]: each (key, value) item joins as "key=value"
+        return f"Added effect '{effect_id}' to clip {clip_id} with {', '.join(map('='.join, params.items()))}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def remove_effect(ctx: Context, clip_id: int, effect_id: str) -> str:
         """Remove an effect from a timeline clip.
 
@@ -62,32 +67,28 @@ def register(mcp, helpers):
             clip_id: Timeline clip ID.
             effect_id: MLT effect ID to remove (e.g. "qtblend").
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.remove_clip_effect(clip_id, effect_id)
-            if not ok:
-                return f"ERROR: Could not remove effect '{effect_id}' from clip {clip_id}"
-            return f"Removed effect '{effect_id}' from clip {clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.remove_clip_effect(clip_id, effect_id)
+        if not ok:
+            return f"ERROR: Could not remove effect '{effect_id}' from clip {clip_id}"
+        return f"Removed effect '{effect_id}' from clip {clip_id}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_clip_effects(ctx: Context, clip_id: int) -> str:
         """List all effects on a timeline clip.
 
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            effects = resolve._dbus.get_clip_effects(clip_id)
-            if not effects:
-                return f"Clip {clip_id}: no effects"
-            return f"Clip {clip_id} effects: {effects}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        effects = dbus.get_clip_effects(clip_id)
+        if not effects:
+            return f"Clip {clip_id}: no effects"
+        return f"Clip {clip_id} effects: {effects}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def set_effect_param(ctx: Context, clip_id: int, effect_id: str,
                          param_name: str, value: str) -> str:
         """Set a single parameter on an existing effect.
@@ -98,17 +99,15 @@ def register(mcp, helpers):
             param_name: Parameter name (e.g. "shader_text", "av.brightness").
             value: New value as string.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_effect_param(clip_id, effect_id,
-                                                param_name, value)
-            if not ok:
-                return f"ERROR: Could not set param '{param_name}' on effect '{effect_id}' (clip {clip_id})"
-            return f"Set {effect_id}.{param_name} = {value!r} on clip {clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_effect_param(clip_id, effect_id,
+                                   param_name, value)
+        if not ok:
+            return f"ERROR: Could not set param '{param_name}' on effect '{effect_id}' (clip {clip_id})"
+        return f"Set {effect_id}.{param_name} = {value!r} on clip {clip_id}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_effect_param(ctx: Context, clip_id: int, effect_id: str,
                          param_name: str) -> str:
         """Read a single parameter value from an effect.
@@ -118,17 +117,15 @@ def register(mcp, helpers):
             effect_id: MLT effect ID.
             param_name: Parameter name to read.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            val = resolve._dbus.get_effect_param(clip_id, effect_id,
-                                                 param_name)
-            if not val:
-                return f"ERROR: No value for '{param_name}' on effect '{effect_id}' (clip {clip_id})"
-            return f"{effect_id}.{param_name} = {val!r}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        val = dbus.get_effect_param(clip_id, effect_id,
+                                    param_name)
+        if not val:
+            return f"ERROR: No value for '{param_name}' on effect '{effect_id}' (clip {clip_id})"
+        return f"{effect_id}.{param_name} = {val!r}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def set_effect_expression(ctx: Context, clip_id: int, effect_id: str,
                               param_name: str, expression: str,
                               base_value: float) -> str:
@@ -144,19 +141,17 @@ def register(mcp, helpers):
             expression: JavaScript expression string.
             base_value: The base "value" variable the expression can reference.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_effect_expression(clip_id, effect_id,
-                                                     param_name, expression,
-                                                     base_value)
-            if not ok:
-                return f"ERROR: Could not set expression on '{param_name}' (effect '{effect_id}', clip {clip_id})"
-            return (f"Set expression on {effect_id}.{param_name}: "
-                    f"{expression!r} (base={base_value})")
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_effect_expression(clip_id, effect_id,
+                                        param_name, expression,
+                                        base_value)
+        if not ok:
+            return f"ERROR: Could not set expression on '{param_name}' (effect '{effect_id}', clip {clip_id})"
+        return (f"Set expression on {effect_id}.{param_name}: "
+                f"{expression!r} (base={base_value})")
 
     @mcp.tool()
+    @helpers.safe_tool
     def clear_effect_expression(ctx: Context, clip_id: int, effect_id: str,
                                 param_name: str) -> str:
         """Remove a JavaScript expression from an effect parameter.
@@ -168,17 +163,15 @@ def register(mcp, helpers):
             effect_id: MLT effect ID.
             param_name: Parameter name to clear expression from.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.clear_effect_expression(clip_id, effect_id,
-                                                       param_name)
-            if not ok:
-                return f"ERROR: Could not clear expression on '{param_name}' (effect '{effect_id}', clip {clip_id})"
-            return f"Cleared expression on {effect_id}.{param_name} (clip {clip_id})"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.clear_effect_expression(clip_id, effect_id,
+                                          param_name)
+        if not ok:
+            return f"ERROR: Could not clear expression on '{param_name}' (effect '{effect_id}', clip {clip_id})"
+        return f"Cleared expression on {effect_id}.{param_name} (clip {clip_id})"
 
     @mcp.tool()
+    @helpers.safe_tool
     def set_clip_opacity(ctx: Context, clip_id: int, opacity: float = 1.0,
                          keyframes: dict[int, float] | None = None) -> str:
         """Set clip opacity (transparency). Uses qtblend effect internally.
@@ -189,27 +182,25 @@ def register(mcp, helpers):
             keyframes: Optional dict {frame: opacity} for animated opacity.
                        Frame is relative to clip start. Example: {0: 0.0, 25: 1.0} for 1s fade-in.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            params: dict[str, str] = {}
-            if keyframes:
-                # MLT keyframe syntax: "frame=value;frame=value"
-                kf_str = ";".join(
-                    f"{f}={int(v * 100)}" for f, v in sorted(keyframes.items())
-                )
-                params["opacity"] = kf_str
-            else:
-                params["opacity"] = str(int(opacity * 100))
-            ok = resolve._dbus.add_clip_effect(clip_id, "qtblend", params)
-            if not ok:
-                return f"ERROR: Could not set opacity on clip {clip_id}"
-            if keyframes:
-                return f"Set animated opacity on clip {clip_id}: {params['opacity']}"
-            return f"Set opacity {opacity:.0%} on clip {clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        params: dict[str, str] = {}
+        if keyframes:
+            # MLT keyframe syntax: "frame=value;frame=value"
+            # (list, not generator: join sizes its buffer in one pass).
+            # Frames are unique dict keys, so sort on them alone
+            items = sorted(keyframes.items(), key=itemgetter(0))
+            params["opacity"] = ";".join([f"{f}={int(v * 100)}" for f, v in items])
+        else:
+            params["opacity"] = str(int(opacity * 100))
+        ok = dbus.add_clip_effect(clip_id, "qtblend", params)
+        if not ok:
+            return f"ERROR: Could not set opacity on clip {clip_id}"
+        if keyframes:
+            return f"Set animated opacity on clip {clip_id}: {params['opacity']}"
+        return f"Set opacity {opacity:.0%} on clip {clip_id}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def fill_frame(ctx: Context, clip_id: int) -> str:
         """Scale a timeline clip to fill the project frame (remove black bars).
 
@@ -220,16 +211,14 @@ def register(mcp, helpers):
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.fill_frame(clip_id)
-            if not ok:
-                return f"ERROR: Could not fill frame for clip {clip_id} (already matching or clip not found)"
-            return f"Applied fill-frame to clip {clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.fill_frame(clip_id)
+        if not ok:
+            return f"ERROR: Could not fill frame for clip {clip_id} (already matching or clip not found)"
+        return f"Applied fill-frame to clip {clip_id}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def paste_effects(ctx: Context, source_clip_id: int,
                       target_clip_id: int) -> str:
         """Copy all effects from one clip and paste them onto another.
@@ -238,35 +227,71 @@ def register(mcp, helpers):
             source_clip_id: Timeline clip ID to copy effects from.
             target_clip_id: Timeline clip ID to paste effects onto.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            xml = resolve._dbus.copy_clip_effects(source_clip_id)
+        dbus = helpers.get_dbus(ctx)
+        copy_paste = getattr(dbus, "copy_paste_clip_effects", None)
+        if copy_paste is not None:
+            # Kdenlive copies in-process: the effect XML never crosses the bus
+            if not copy_paste(source_clip_id, target_clip_id):
+                return (f"ERROR: Could not paste effects from clip {source_clip_id} "
+                        f"onto clip {target_clip_id} (source may have no effects)")
+            return f"Pasted effects from clip {source_clip_id} → clip {target_clip_id}"
+        xml = dbus.copy_clip_effects(source_clip_id)
+        if not xml:
+            return f"ERROR: No effects found on clip {source_clip_id}"
+        ok = dbus.paste_clip_effects(target_clip_id, xml)
+        if not ok:
+            return f"ERROR: Could not paste effects onto clip {target_clip_id}"
+        return f"Pasted effects from clip {source_clip_id} → clip {target_clip_id}"
+
+    @mcp.tool()
+    @helpers.safe_tool
+    def paste_effects_to_many(ctx: Context, source_clip_id: int,
+                              target_clip_ids: list[int]) -> str:
+        """Copy all effects from one clip and paste them onto several others.
+
+        The effects are copied once; all pastes form a single undo entry.
+        Targets that could not be pasted onto are listed in the error.
+
+        Args:
+            source_clip_id: Timeline clip ID to copy effects from.
+            target_clip_ids: Timeline clip IDs to paste effects onto.
+        """
+        if not target_clip_ids:
+            return "ERROR: No target clips given"
+        dbus = helpers.get_dbus(ctx)
+        if hasattr(dbus, "copy_paste_clip_effects"):
+            # Kdenlive copies in-process: the effect XML never crosses the bus
+            calls = [("copy_paste_clip_effects", (source_clip_id, tid)) for tid in target_clip_ids]
+        else:
+            xml = dbus.copy_clip_effects(source_clip_id)
             if not xml:
                 return f"ERROR: No effects found on clip {source_clip_id}"
-            ok = resolve._dbus.paste_clip_effects(target_clip_id, xml)
-            if not ok:
-                return f"ERROR: Could not paste effects onto clip {target_clip_id}"
-            return f"Pasted effects from clip {source_clip_id} → clip {target_clip_id}"
-        except Exception as e:
-            return f"ERROR: {e}"
+            calls = [("paste_clip_effects", (tid, xml)) for tid in target_clip_ids]
+        with helpers.undo_group(dbus, "Paste effects"):
+            results = helpers.send_calls(dbus, calls)
+        failed = [tid for tid, ok in zip(target_clip_ids, results) if not ok]
+        if failed:
+            done = len(target_clip_ids) - len(failed)
+            return (f"ERROR: Could not paste effects onto clip(s) {', '.join(map(str, failed))}; "
+                    f"pasted onto {done} of {len(target_clip_ids)} clip(s)")
+        return f"Pasted effects from clip {source_clip_id} onto {len(target_clip_ids)} clip(s)"
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_clip_opacity(ctx: Context, clip_id: int) -> str:
         """Get clip opacity (0.0 = transparent, 1.0 = fully opaque).
 
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            opacity = resolve._dbus.get_clip_opacity(clip_id)
-            if opacity < 0:
-                return f"ERROR: Clip {clip_id} not found"
-            return f"Clip {clip_id} opacity: {opacity:.1%}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        opacity = dbus.get_clip_opacity(clip_id)
+        if opacity < 0:
+            return f"ERROR: Clip {clip_id} not found"
+        return f"Clip {clip_id} opacity: {opacity:.1%}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def set_clip_enabled(ctx: Context, clip_id: int, enabled: bool) -> str:
         """Enable or disable a clip (blind eye icon).
 
@@ -274,33 +299,29 @@ def register(mcp, helpers):
             clip_id: Timeline clip ID.
             enabled: True to enable, False to disable.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_clip_enabled(clip_id, enabled)
-            if not ok:
-                return f"ERROR: Could not set enabled state for clip {clip_id}"
-            state = "enabled" if enabled else "disabled"
-            return f"Clip {clip_id} {state}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_clip_enabled(clip_id, enabled)
+        if not ok:
+            return f"ERROR: Could not set enabled state for clip {clip_id}"
+        state = "enabled" if enabled else "disabled"
+        return f"Clip {clip_id} {state}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_clip_color(ctx: Context, clip_id: int) -> str:
         """Get clip color tags (semicolon-separated hex colors stored as bin clip tags).
 
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            color = resolve._dbus.get_clip_color(clip_id)
-            if not color:
-                return f"Clip {clip_id} has no color tags"
-            return f"Clip {clip_id} color tags: {color}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        color = dbus.get_clip_color(clip_id)
+        if not color:
+            return f"Clip {clip_id} has no color tags"
+        return f"Clip {clip_id} color tags: {color}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def set_clip_color(ctx: Context, clip_id: int, color_tag: str) -> str:
         """Set clip color tags (stored on the bin clip).
 
@@ -308,11 +329,8 @@ def register(mcp, helpers):
             clip_id: Timeline clip ID.
             color_tag: Semicolon-separated hex colors (e.g. '#ff0000;#00ff00'). Pass empty string to clear.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_clip_color(clip_id, color_tag)
-            if not ok:
-                return f"ERROR: Could not set color for clip {clip_id}"
-            return f"Clip {clip_id} color tags set to: {color_tag}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_clip_color(clip_id, color_tag)
+        if not ok:
+            return f"ERROR: Could not set color for clip {clip_id}"
+        return f"Clip {clip_id} color tags set to: {color_tag}"
@@ -7,11 +7,13 @@ Supports two addressing modes:
 
 from __future__ import annotations
 
+from types import MappingProxyType
+
 from mcp.server.fastmcp import Context
 
 
 # Keyframe type name → integer mapping for D-Bus transport
-_TYPE_MAP = {
+_TYPE_MAP = MappingProxyType({
     "linear": 0,
     "discrete": 1,
     "smooth": 3,       # smooth_natural in MLT
@@ -25,12 +27,39 @@ _TYPE_MAP = {
     "circular_out": 11,
     "elastic_in": 12,
     "elastic_out": 13,
-}
+})
+_VALID_TYPES = ", ".join(_TYPE_MAP)
+
+
+def _unknown_type(keyframe_type: str) -> str:
+    """Error string for a keyframe type missing from _TYPE_MAP."""
+    return f"ERROR: Unknown keyframe_type {keyframe_type!r}; valid: {_VALID_TYPES}"
+
+
+# effect asset id → primary parameter name. The primary parameter comes from
+# the effect definition, not the clip instance, so entries never go stale.
+_primary_params: dict[str, str] = {}
+
+
+def _primary_param(dbus, clip_id: int, effect_id: str) -> str:
+    """Return the primary parameter name of effect_id, or "" to let Kdenlive pick.
+
+    Asks Kdenlive once per effect (if kdenlive_api has get_primary_param),
+    so later calls skip its server-side parameter scan.
+    """
+    name = _primary_params.get(effect_id)
+    if name is None:
+        get_primary = getattr(dbus, "get_primary_param", None)
+        name = get_primary(clip_id, effect_id) if get_primary is not None else ""
+        if name:
+            _primary_params[effect_id] = name
+    return name
 
 
 def register(mcp, helpers):
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_effect_keyframes(ctx: Context, clip_id: int,
                              effect_index: int = 0) -> str:
         """Get all keyframes for an effect on a timeline clip.
@@ -41,26 +70,15 @@ def register(mcp, helpers):
 
         Returns a markdown table: frame | type | value
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            fps = helpers.get_fps(ctx)
-            kfs = resolve._dbus.get_effect_keyframes(clip_id, effect_index)
-            if not kfs:
-                return f"No keyframes on clip {clip_id} effect #{effect_index} (effect may not exist or has no keyframes)."
-            header = "| frame | timecode | type | value |"
-            sep = "|-------|----------|------|-------|"
-            lines = [header, sep]
-            for kf in kfs:
-                frame = kf.get("frame", "")
-                kf_type = kf.get("type", "")
-                value = kf.get("value", "")
-                tc = helpers.format_tc(int(frame), fps) if frame != "" else ""
-                lines.append(f"| {frame} | {tc} | {kf_type} | {value} |")
-            return "\n".join(lines)
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        fps = helpers.get_fps(ctx)
+        kfs = dbus.get_effect_keyframes(clip_id, effect_index)
+        if not kfs:
+            return f"No keyframes on clip {clip_id} effect #{effect_index} (effect may not exist or has no keyframes)."
+        return helpers.keyframes_table(kfs, fps)
 
     @mcp.tool()
+    @helpers.safe_tool
     def add_effect_keyframe(ctx: Context, clip_id: int,
                             frame: int, value: float = 0.0,
                             effect_index: int = 0,
@@ -77,18 +95,54 @@ def register(mcp, helpers):
                 "exponential_in", "exponential_out", "circular_in",
                 "circular_out", "elastic_in", "elastic_out".
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            kf_type_int = _TYPE_MAP.get(keyframe_type, -1)
-            ok = resolve._dbus.add_effect_keyframe(
-                clip_id, effect_index, frame, value, kf_type_int)
-            if not ok:
-                return f"ERROR: Could not add keyframe at frame {frame} on clip {clip_id} effect #{effect_index}"
-            return f"Added {keyframe_type} keyframe at frame {frame} (value={value:.3f}) on clip {clip_id} effect #{effect_index}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        helpers.check_i32(clip_id=clip_id, frame=frame)
+        kf_type_int = _TYPE_MAP.get(keyframe_type, -1)
+        if kf_type_int < 0:
+            return _unknown_type(keyframe_type)
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.add_effect_keyframe(
+            clip_id, effect_index, frame, value, kf_type_int)
+        if not ok:
+            return f"ERROR: Could not add keyframe at frame {frame} on clip {clip_id} effect #{effect_index}"
+        return f"Added {keyframe_type} keyframe at frame {frame} (value={value:.3f}) on clip {clip_id} effect #{effect_index}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    def add_effect_keyframes_bulk(ctx: Context, clip_id: int,
+                                  keyframes: list[tuple[int, float, str]],
+                                  effect_index: int = 0) -> str:
+        """Add several keyframes to an effect on a timeline clip in one call.
+
+        Args:
+            clip_id: Timeline clip ID.
+            keyframes: List of (frame, value, keyframe_type) entries, e.g.
+                [[0, 0.0, "linear"], [25, 1.0, "smooth"]]. Values are normalized 0.0–1.0.
+            effect_index: 0-based index of the effect in the stack (default 0).
+        """
+        if not keyframes:
+            return "ERROR: No keyframes given"
+        bad = next((t for _, _, t in keyframes if t not in _TYPE_MAP), None)
+        if bad is not None:
+            return _unknown_type(bad)
+        dbus = helpers.get_dbus(ctx)
+        frames = [int(f) for f, _, _ in keyframes]
+        helpers.check_i32(clip_id=clip_id, first_frame=min(frames), last_frame=max(frames))
+        values = [float(v) for _, v, _ in keyframes]
+        types = [_TYPE_MAP[t] for _, _, t in keyframes]
+        add_many = getattr(dbus, "add_effect_keyframes_bulk", None)
+        if add_many is not None:
+            # Parallel ai/ad/ai arrays: one round trip for the whole list
+            if not add_many(clip_id, effect_index, frames, values, types):
+                return f"ERROR: Could not add keyframes on clip {clip_id} effect #{effect_index}"
+        else:
+            with helpers.undo_group(dbus, "Add keyframes"), helpers.batch(dbus):
+                for args in zip(frames, values, types):
+                    helpers.call_dbus(dbus, "add_effect_keyframe",
+                                      clip_id, effect_index, *args)
+        return f"Added {len(frames)} keyframe(s) (frames {min(frames)}–{max(frames)}) on clip {clip_id} effect #{effect_index}"
+
+    @mcp.tool()
+    @helpers.safe_tool
     def remove_effect_keyframe(ctx: Context, clip_id: int,
                                frame: int,
                                effect_index: int = 0) -> str:
@@ -99,16 +153,15 @@ def register(mcp, helpers):
             frame: Frame position of the keyframe to remove.
             effect_index: 0-based index of the effect in the stack (default 0).
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.remove_effect_keyframe(clip_id, effect_index, frame)
-            if not ok:
-                return f"ERROR: Could not remove keyframe at frame {frame} on clip {clip_id} effect #{effect_index}"
-            return f"Removed keyframe at frame {frame} from clip {clip_id} effect #{effect_index}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        helpers.check_i32(clip_id=clip_id, frame=frame)
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.remove_effect_keyframe(clip_id, effect_index, frame)
+        if not ok:
+            return f"ERROR: Could not remove keyframe at frame {frame} on clip {clip_id} effect #{effect_index}"
+        return f"Removed keyframe at frame {frame} from clip {clip_id} effect #{effect_index}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def update_effect_keyframe(ctx: Context, clip_id: int,
                                old_frame: int, new_frame: int,
                                value: float = -1.0,
@@ -122,25 +175,24 @@ def register(mcp, helpers):
             value: New normalized value 0.0–1.0 (-1 to keep existing value).
             effect_index: 0-based index of the effect in the stack (default 0).
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.update_effect_keyframe(
-                clip_id, effect_index, old_frame, new_frame, value)
-            if not ok:
-                return f"ERROR: Could not update keyframe at frame {old_frame} on clip {clip_id} effect #{effect_index}"
-            parts = []
-            if old_frame != new_frame:
-                parts.append(f"moved {old_frame}→{new_frame}")
-            if value >= 0:
-                parts.append(f"value={value:.3f}")
-            detail = ", ".join(parts) if parts else "no changes"
-            return f"Updated keyframe on clip {clip_id} effect #{effect_index}: {detail}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        helpers.check_i32(clip_id=clip_id, old_frame=old_frame, new_frame=new_frame)
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.update_effect_keyframe(
+            clip_id, effect_index, old_frame, new_frame, value)
+        if not ok:
+            return f"ERROR: Could not update keyframe at frame {old_frame} on clip {clip_id} effect #{effect_index}"
+        parts = []
+        if old_frame != new_frame:
+            parts.append(f"moved {old_frame}→{new_frame}")
+        if value >= 0:
+            parts.append(f"value={value:.3f}")
+        detail = ", ".join(parts) if parts else "no changes"
+        return f"Updated keyframe on clip {clip_id} effect #{effect_index}: {detail}"
 
     # ── Parameter-name-based keyframe tools ──────────────────────────
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_effect_keyframes_by_param(ctx: Context, clip_id: int,
                                       effect_id: str, param_name: str = "") -> str:
         """Get keyframes for a specific parameter of a named effect.
@@ -153,27 +205,18 @@ def register(mcp, helpers):
             effect_id: Effect asset ID (e.g. "brightness", "qtblend").
             param_name: Parameter name (e.g. "opacity", "level"). Empty = primary parameter.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            fps = helpers.get_fps(ctx)
-            kfs = resolve._dbus.get_effect_keyframes_by_param(
-                clip_id, effect_id, param_name)
-            if not kfs:
-                return f"No keyframes for {effect_id}.{param_name or '(primary)'} on clip {clip_id}"
-            header = "| frame | timecode | type | value |"
-            sep = "|-------|----------|------|-------|"
-            lines = [header, sep]
-            for kf in kfs:
-                frame = kf.get("frame", "")
-                kf_type = kf.get("type", "")
-                value = kf.get("value", "")
-                tc = helpers.format_tc(int(frame), fps) if frame != "" else ""
-                lines.append(f"| {frame} | {tc} | {kf_type} | {value} |")
-            return "\n".join(lines)
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        fps = helpers.get_fps(ctx)
+        if not param_name:
+            param_name = _primary_param(dbus, clip_id, effect_id)
+        kfs = dbus.get_effect_keyframes_by_param(
+            clip_id, effect_id, param_name)
+        if not kfs:
+            return f"No keyframes for {effect_id}.{param_name or '(primary)'} on clip {clip_id}"
+        return helpers.keyframes_table(kfs, fps)
 
     @mcp.tool()
+    @helpers.safe_tool
     def add_effect_keyframe_by_param(ctx: Context, clip_id: int,
                                       effect_id: str, param_name: str,
                                       frame: int, value: str = "",
@@ -188,18 +231,19 @@ def register(mcp, helpers):
             value: Parameter value as string (format depends on effect).
             keyframe_type: "linear", "discrete", "smooth", etc.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            kf_type_int = _TYPE_MAP.get(keyframe_type, -1)
-            ok = resolve._dbus.add_effect_keyframe_by_param(
-                clip_id, effect_id, param_name, frame, value, kf_type_int)
-            if not ok:
-                return f"ERROR: Could not add keyframe at frame {frame} for {effect_id}.{param_name}"
-            return f"Added {keyframe_type} keyframe at frame {frame} for {effect_id}.{param_name}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        helpers.check_i32(clip_id=clip_id, frame=frame)
+        kf_type_int = _TYPE_MAP.get(keyframe_type, -1)
+        if kf_type_int < 0:
+            return _unknown_type(keyframe_type)
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.add_effect_keyframe_by_param(
+            clip_id, effect_id, param_name, frame, value, kf_type_int)
+        if not ok:
+            return f"ERROR: Could not add keyframe at frame {frame} for {effect_id}.{param_name}"
+        return f"Added {keyframe_type} keyframe at frame {frame} for {effect_id}.{param_name}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def remove_effect_keyframe_by_param(ctx: Context, clip_id: int,
                                          effect_id: str, param_name: str,
                                          frame: int) -> str:
@@ -211,38 +255,33 @@ def register(mcp, helpers):
             param_name: Parameter name.
             frame: Frame position of the keyframe to remove.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.remove_effect_keyframe_by_param(
-                clip_id, effect_id, param_name, frame)
-            if not ok:
-                return f"ERROR: Could not remove keyframe at frame {frame} from {effect_id}.{param_name}"
-            return f"Removed keyframe at frame {frame} from {effect_id}.{param_name}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        helpers.check_i32(clip_id=clip_id, frame=frame)
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.remove_effect_keyframe_by_param(
+            clip_id, effect_id, param_name, frame)
+        if not ok:
+            return f"ERROR: Could not remove keyframe at frame {frame} from {effect_id}.{param_name}"
+        return f"Removed keyframe at frame {frame} from {effect_id}.{param_name}"
 
     # ── Clip Transform Keyframe tools ────────────────────────────────
 
     @mcp.tool()
+    @helpers.safe_tool
     def get_clip_transform_keyframes(ctx: Context, clip_id: int) -> str:
         """Get transform keyframes (position, size, opacity) from a clip.
 
         Args:
             clip_id: Timeline clip ID.
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            kfs = resolve._dbus.get_clip_transform_keyframes(clip_id)
-            if not kfs:
-                return f"No transform keyframes on clip {clip_id}"
-            lines = ["| frame | value |", "|-------|-------|"]
-            for kf in kfs:
-                lines.append(f"| {kf.get('frame', '?')} | {kf.get('value', '?')} |")
-            return f"{len(kfs)} keyframe(s):\n\n" + "\n".join(lines)
-        except Exception as e:
-            return f"ERROR: {e}"
+        dbus = helpers.get_dbus(ctx)
+        kfs = dbus.get_clip_transform_keyframes(clip_id)
+        if not kfs:
+            return f"No transform keyframes on clip {clip_id}"
+        rows = "\n".join(f"| {kf.get('frame', '?')} | {kf.get('value', '?')} |" for kf in kfs)
+        return f"{len(kfs)} keyframe(s):\n\n| frame | value |\n|-------|-------|\n{rows}"
 
     @mcp.tool()
+    @helpers.safe_tool
     def set_clip_transform(ctx: Context, clip_id: int, frame: int,
                            x: int, y: int, width: int, height: int,
                            opacity: float = 1.0) -> str:
@@ -257,11 +296,40 @@ def register(mcp, helpers):
             height: Height in pixels.
             opacity: Opacity 0.0-1.0 (default 1.0).
         """
-        try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.set_clip_transform(clip_id, frame, x, y, width, height, opacity)
-            if not ok:
-                return f"ERROR: Could not set transform on clip {clip_id}"
-            return f"Transform keyframe set on clip {clip_id} at frame {frame}: ({x},{y}) {width}x{height} opacity={opacity:.0%}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        helpers.check_i32(clip_id=clip_id, frame=frame, x=x, y=y, width=width, height=height)
+        dbus = helpers.get_dbus(ctx)
+        ok = dbus.set_clip_transform(clip_id, frame, x, y, width, height, opacity)
+        if not ok:
+            return f"ERROR: Could not set transform on clip {clip_id}"
+        return f"Transform keyframe set on clip {clip_id} at frame {frame}: ({x},{y}) {width}x{height} opacity={opacity:.0%}"
+
+    @mcp.tool()
+    @helpers.safe_tool
+    def set_clip_transform_bulk(ctx: Context, clip_id: int,
+                                keyframes: list[tuple[int, int, int, int, int, float]]) -> str:
+        """Set several transform keyframes on a clip in one call.
+
+        Args:
+            clip_id: Timeline clip ID.
+            keyframes: List of (frame, x, y, width, height, opacity) entries,
+                e.g. [[0, 0, 0, 1920, 1080, 1.0], [50, 480, 270, 960, 540, 0.5]].
+        """
+        if not keyframes:
+            return "ERROR: No keyframes given"
+        dbus = helpers.get_dbus(ctx)
+        frames = [int(kf[0]) for kf in keyframes]
+        helpers.check_i32(clip_id=clip_id, first_frame=min(frames), last_frame=max(frames))
+        rects = [tuple(int(n) for n in kf[1:5]) for kf in keyframes]
+        coords = [n for rect in rects for n in rect]
+        helpers.check_i32(rect_min=min(coords), rect_max=max(coords))
+        opacities = [float(kf[5]) for kf in keyframes]
+        set_many = getattr(dbus, "set_clip_transform_bulk", None)
+        if set_many is not None:
+            if not set_many(clip_id, frames, rects, opacities):
+                return f"ERROR: Could not set transform keyframes on clip {clip_id}"
+        else:
+            with helpers.undo_group(dbus, "Set transform"), helpers.batch(dbus):
+                for frame, rect, opacity in zip(frames, rects, opacities):
+                    helpers.call_dbus(dbus, "set_clip_transform",
+                                      clip_id, frame, *rect, opacity)
+        return f"Set {len(frames)} transform keyframe(s) on clip {clip_id} (frames {min(frames)}–{max(frames)})"
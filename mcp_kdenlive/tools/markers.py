@@ -6,6 +6,21 @@ from mcp.server.fastmcp import Context
 
 from kdenlive_api.constants import MARKER_COLOR_MAP, MARKER_CATEGORY_TO_COLOR
 
+# Lower-cased color name → canonical name, built once at import
+_COLORS = {name.lower(): name for name in MARKER_COLOR_MAP}
+_VALID_COLORS = ", ".join(MARKER_COLOR_MAP)
+
+
+def _canonical_color(color: str) -> str:
+    """Return the MARKER_COLOR_MAP spelling of color (case-insensitive).
+
+    Raises ValueError for unknown colors, before any D-Bus call is made.
+    """
+    canonical = _COLORS.get(color.lower())
+    if canonical is None:
+        raise ValueError(f"Unknown marker color {color!r}; valid: {_VALID_COLORS}")
+    return canonical
+
 
 def register(mcp, helpers):
 
@@ -38,6 +53,7 @@ def register(mcp, helpers):
             note: Optional note text.
         """
         try:
+            color = _canonical_color(color)
             tl = helpers.get_timeline(ctx)
             fps = helpers.get_fps(ctx)
             ok = tl.AddMarker(frame, color, label, note)
@@ -72,6 +88,7 @@ def register(mcp, helpers):
             color: Color name (Purple, Blue, Cyan, Green, Yellow, Orange, Red).
         """
         try:
+            color = _canonical_color(color)
             tl = helpers.get_timeline(ctx)
             ok = tl.DeleteMarkersByColor(color)
             if not ok:
@@ -115,6 +132,7 @@ def register(mcp, helpers):
             note: Optional note text.
         """
         try:
+            color = _canonical_color(color)
             fps = helpers.get_fps(ctx)
             mp = helpers.get_media_pool(ctx)
             item = mp.GetClipById(bin_clip_id)
@@ -153,6 +171,7 @@ def register(mcp, helpers):
             color: Color name (Purple, Blue, Cyan, Green, Yellow, Orange, Red).
         """
         try:
+            color = _canonical_color(color)
             mp = helpers.get_media_pool(ctx)
             item = mp.GetClipById(bin_clip_id)
             ok = item.DeleteMarkersByColor(color)
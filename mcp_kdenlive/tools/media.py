@@ -2,8 +2,25 @@
 
 from __future__ import annotations
 
+
 from mcp.server.fastmcp import Context
 
+_IMPORT_CHUNK = 32  # paths per ImportMedia call
+_CLIPS_TABLE_HEADER = ("| clip_id | position | duration | name |\n"
+                       "|---------|----------|----------|------|")
+
+
+def _import_in_chunks(pool, file_paths: list[str], folder) -> list:
+    """ImportMedia file_paths _IMPORT_CHUNK at a time; return all imported items.
+
+    Chunks go out one after another: Kdenlive serves D-Bus calls serially on
+    its GUI thread, and sequential calls keep the bin in path order.
+    """
+    items = []
+    for i in range(0, len(file_paths), _IMPORT_CHUNK):
+        items.extend(pool.ImportMedia(file_paths[i:i + _IMPORT_CHUNK], folder) or ())
+    return items
+
 
 def register(mcp, helpers):
 
@@ -23,10 +40,14 @@ def register(mcp, helpers):
                 items = pool.GetAllClips()
             else:
                 # Get clips from specific folder via D-Bus
-                resolve = helpers.get_resolve(ctx)
-                dbus = resolve._dbus
-                clip_ids = dbus.get_folder_clip_ids(folder_id)
-                items = [pool.GetClipById(cid) for cid in clip_ids]
+                dbus = helpers.get_dbus(ctx)
+                get_clips = getattr(dbus, "get_folder_clips", None)
+                if get_clips is not None:
+                    # One round trip: clip property dicts for the whole folder
+                    items = get_clips(folder_id)
+                else:
+                    clip_ids = dbus.get_folder_clip_ids(folder_id)
+                    items = [pool.GetClipById(cid) for cid in clip_ids]
             if not items:
                 return "Media pool is empty."
             return helpers.media_table(items, fps)
@@ -34,6 +55,8 @@ def register(mcp, helpers):
             return f"ERROR: {e}"
 
     @mcp.tool()
+    @helpers.safe_tool
+    @helpers.in_thread
     def import_media(ctx: Context, file_paths: list[str], folder_name: str = "") -> str:
         """Import media files into the media pool. For full import + timeline assembly, use build_timeline instead.
 
@@ -43,18 +66,16 @@ def register(mcp, helpers):
 
         Returns a markdown table of imported clips.
         """
-        try:
-            pool = helpers.get_media_pool(ctx)
-            fps = helpers.get_fps(ctx)
-            folder = None
-            if folder_name:
-                folder = pool.AddSubFolder(None, folder_name)
-            items = pool.ImportMedia(file_paths, folder)
-            if not items:
-                return "ERROR: No clips imported."
-            return f"Imported {len(items)} clip(s):\n\n{helpers.media_table(items, fps)}"
-        except Exception as e:
-            return f"ERROR: {e}"
+        pool = helpers.get_media_pool(ctx)
+        fps = helpers.get_fps(ctx)
+        folder = None
+        if folder_name:
+            folder = pool.AddSubFolder(None, folder_name)
+        items = _import_in_chunks(pool, file_paths, folder)
+        helpers.invalidate_cache("get_all_clip_ids")
+        if not items:
+            return "ERROR: No clips imported."
+        return f"Imported {len(items)} clip(s):\n\n{helpers.media_table(items, fps)}"
 
     @mcp.tool()
     def import_media_glob(ctx: Context, directory: str, pattern: str = "*.mp4", folder_name: str = "") -> str:
@@ -74,6 +95,7 @@ def register(mcp, helpers):
             if folder_name:
                 folder = pool.AddSubFolder(None, folder_name)
             items = pool.ImportMediaFromFolder(directory, pattern, folder)
+            helpers.invalidate_cache("get_all_clip_ids")
             if not items:
                 return "ERROR: No files matched or import failed."
             return f"Imported {len(items)} clip(s):\n\n{helpers.media_table(items, fps)}"
@@ -95,6 +117,7 @@ def register(mcp, helpers):
                 # Use root folder as parent; sub-folder navigation limited by D-Bus
                 parent = pool.GetRootFolder()
             folder = pool.AddSubFolder(parent, name)
+            helpers.invalidate_cache("get_all_clip_ids")
             if folder is None:
                 return f"ERROR: Could not create folder '{name}'"
             fid = folder.folder_id if hasattr(folder, "folder_id") else "?"
@@ -111,8 +134,8 @@ def register(mcp, helpers):
             target_folder_id: Target folder ID. "-1" for root.
         """
         try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.move_bin_clip(bin_id, target_folder_id)
+            dbus = helpers.get_dbus(ctx)
+            ok = dbus.move_bin_clip(bin_id, target_folder_id)
             if ok:
                 return f"Moved clip {bin_id} to folder {target_folder_id}"
             return f"ERROR: Could not move clip {bin_id} to folder {target_folder_id}"
@@ -128,8 +151,8 @@ def register(mcp, helpers):
             new_name: New clip name.
         """
         try:
-            resolve = helpers.get_resolve(ctx)
-            ok = resolve._dbus.rename_bin_clip(bin_id, new_name)
+            dbus = helpers.get_dbus(ctx)
+            ok = dbus.rename_bin_clip(bin_id, new_name)
             if ok:
                 return f"Renamed clip {bin_id} → '{new_name}'"
             return f"ERROR: Could not rename bin clip {bin_id}"
@@ -146,9 +169,9 @@ def register(mcp, helpers):
         Returns name, duration, type, url and timecode info as a markdown list.
         """
         try:
-            resolve = helpers.get_resolve(ctx)
+            dbus = helpers.get_dbus(ctx)
             fps = helpers.get_fps(ctx)
-            props = resolve._dbus.get_clip_properties(bin_id)
+            props = dbus.get_clip_properties(bin_id)
             if not props:
                 return f"ERROR: No properties returned for bin clip {bin_id}"
             lines = []
@@ -170,8 +193,8 @@ def register(mcp, helpers):
         Returns all bin clip IDs as a comma-separated list with a total count.
         """
         try:
-            resolve = helpers.get_resolve(ctx)
-            ids = resolve._dbus.get_all_clip_ids()
+            dbus = helpers.get_dbus(ctx)
+            ids = helpers.cached_dbus(dbus, "get_all_clip_ids")
             if not ids:
                 return "Media pool is empty (0 clips)."
             return f"**{len(ids)} clip(s):** {', '.join(ids)}"
@@ -188,22 +211,18 @@ def register(mcp, helpers):
         Returns a markdown table with clip_id, position, duration and name.
         """
         try:
-            resolve = helpers.get_resolve(ctx)
+            dbus = helpers.get_dbus(ctx)
             fps = helpers.get_fps(ctx)
-            clips = resolve._dbus.get_clips_on_track(track_id)
+            clips = dbus.get_clips_on_track(track_id)
             if not clips:
                 return f"No clips on track {track_id}."
-            header = "| clip_id | position | duration | name |"
-            sep = "|---------|----------|----------|------|"
-            lines = [header, sep]
-            for c in clips:
-                cid = c.get("clip_id", c.get("id", ""))
-                pos = int(c.get("position", 0))
-                dur = int(c.get("duration", 0))
-                name = c.get("name", "")
-                pos_tc = helpers.format_tc(pos, fps)
-                dur_tc = helpers.format_tc(dur, fps)
-                lines.append(f"| {cid} | {pos_tc} | {dur_tc} | {name} |")
+            fmt = helpers.format_tc
+            lines = [_CLIPS_TABLE_HEADER] + [None] * len(clips)
+            for i, c in enumerate(clips, 1):
+                # Older kdenlive_api builds key the id as "id"
+                cid = c["clip_id"] if "clip_id" in c else c.get("id", "")
+                lines[i] = (f"| {cid} | {fmt(int(c.get('position', 0)), fps)} "
+                            f"| {fmt(int(c.get('duration', 0)), fps)} | {c.get('name', '')} |")
             return "\n".join(lines)
         except Exception as e:
             return f"ERROR: {e}"
@@ -216,8 +235,8 @@ def register(mcp, helpers):
             bin_id: The clip's bin ID.
         """
         try:
-            resolve = helpers.get_resolve(ctx)
-            meta = resolve._dbus.get_clip_metadata(bin_id)
+            dbus = helpers.get_dbus(ctx)
+            meta = dbus.get_clip_metadata(bin_id)
             if not meta or meta.get("id") is None:
                 return f"ERROR: Clip {bin_id} not found"
             lines = []
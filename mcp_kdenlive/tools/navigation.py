@@ -7,54 +7,43 @@ from mcp.server.fastmcp import Context
 
 def register(mcp, helpers):
 
-    @mcp.tool()
-    def go_to_next_marker(ctx: Context) -> str:
-        """Seek playhead to the next guide/marker on the timeline."""
+    def _go_to(ctx: Context, kind: str, direction: str) -> str:
+        """Seek to the next/previous marker or edit and describe where the playhead landed.
+
+        Uses dbus.go_to(kind, ±1) when kdenlive_api has the combined call,
+        otherwise dbus.go_to_<direction>_<kind>().
+        """
         try:
-            resolve = helpers.get_resolve(ctx)
+            dbus = helpers.get_dbus(ctx)
             fps = helpers.get_fps(ctx)
-            frame = int(resolve._dbus.go_to_next_marker())
+            go_to = getattr(dbus, "go_to", None)
+            if go_to is not None:
+                frame = int(go_to(kind, 1 if direction == "next" else -1))
+            else:
+                frame = int(getattr(dbus, f"go_to_{direction}_{kind}")())
+            label = "edit point" if kind == "edit" else kind
             if frame < 0:
-                return "No next marker found"
-            return f"Seeked to next marker at {helpers.format_tc(int(frame), fps)} (frame {frame})"
+                return f"No {direction} {label} found"
+            return f"Seeked to {direction} {kind} at {helpers.format_tc(int(frame), fps)} (frame {frame})"
         except Exception as e:
             return f"ERROR: {e}"
 
+    @mcp.tool()
+    def go_to_next_marker(ctx: Context) -> str:
+        """Seek playhead to the next guide/marker on the timeline."""
+        return _go_to(ctx, "marker", "next")
+
     @mcp.tool()
     def go_to_previous_marker(ctx: Context) -> str:
         """Seek playhead to the previous guide/marker on the timeline."""
-        try:
-            resolve = helpers.get_resolve(ctx)
-            fps = helpers.get_fps(ctx)
-            frame = int(resolve._dbus.go_to_previous_marker())
-            if frame < 0:
-                return "No previous marker found"
-            return f"Seeked to previous marker at {helpers.format_tc(int(frame), fps)} (frame {frame})"
-        except Exception as e:
-            return f"ERROR: {e}"
+        return _go_to(ctx, "marker", "previous")
 
     @mcp.tool()
     def go_to_next_edit(ctx: Context) -> str:
         """Seek playhead to the next clip boundary (cut point) on any track."""
-        try:
-            resolve = helpers.get_resolve(ctx)
-            fps = helpers.get_fps(ctx)
-            frame = int(resolve._dbus.go_to_next_edit())
-            if frame < 0:
-                return "No next edit point found"
-            return f"Seeked to next edit at {helpers.format_tc(int(frame), fps)} (frame {frame})"
-        except Exception as e:
-            return f"ERROR: {e}"
+        return _go_to(ctx, "edit", "next")
 
     @mcp.tool()
     def go_to_previous_edit(ctx: Context) -> str:
         """Seek playhead to the previous clip boundary (cut point) on any track."""
-        try:
-            resolve = helpers.get_resolve(ctx)
-            fps = helpers.get_fps(ctx)
-            frame = int(resolve._dbus.go_to_previous_edit())
-            if frame < 0:
-                return "No previous edit point found"
-            return f"Seeked to previous edit at {helpers.format_tc(int(frame), fps)} (frame {frame})"
-        except Exception as e:
-            return f"ERROR: {e}"
+        return _go_to(ctx, "edit", "previous")
@@ -46,6 +46,7 @@ def register(mcp, helpers):
         try:
             resolve = helpers.get_resolve(ctx)
             result = resolve._dbus.new_project(name)
+            helpers.invalidate_ctx(ctx)
             return f"Created new project '{name}'" if result else "ERROR: Could not create project"
         except Exception as e:
             return f"ERROR: {e}"
@@ -63,6 +64,7 @@ def register(mcp, helpers):
         try:
             resolve = helpers.get_resolve(ctx)
             ok = resolve._dbus.open_project(file_path)
+            helpers.invalidate_ctx(ctx)
             if not ok:
                 return f"ERROR: Could not open {file_path}"
             return f"Opened project: {file_path}"
@@ -83,6 +85,7 @@ def register(mcp, helpers):
         try:
             resolve = helpers.get_resolve(ctx)
             ok = resolve._dbus.set_project_profile(width, height, fps_num, fps_den)
+            helpers.invalidate_ctx(ctx)
             if not ok:
                 return f"ERROR: Could not set profile {width}x{height} {fps_num}/{fps_den}fps"
             fps = fps_num / fps_den
@@ -231,6 +234,7 @@ def register(mcp, helpers):
             resolve = helpers.get_resolve(ctx)
             pm = resolve.GetProjectManager()
             proj = pm.LoadProject(file_path)
+            helpers.invalidate_ctx(ctx)
             if proj is None:
                 return f"ERROR: Could not load {file_path}"
             fps = proj.GetFps()
@@ -23,6 +23,8 @@ def register(mcp, helpers):
         try:
             resolve = helpers.get_resolve(ctx)
             bin_id = resolve._dbus.create_sequence(name, audio_tracks, video_tracks, parent_folder)
+            helpers.invalidate_ctx(ctx)
+            helpers.invalidate_cache("get_all_clip_ids")
             if bin_id == "-1" or not bin_id:
                 return "ERROR: Could not create sequence"
             return f"Created sequence '{name}' (bin_id={bin_id})"
@@ -88,6 +90,7 @@ def register(mcp, helpers):
         try:
             resolve = helpers.get_resolve(ctx)
             ok = resolve._dbus.set_active_sequence(uuid)
+            helpers.invalidate_ctx(ctx)
             if not ok:
                 return f"ERROR: Could not switch to sequence '{uuid}' (not found or failed to open)"
             return f"Switched to sequence '{uuid}'"
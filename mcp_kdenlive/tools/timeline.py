@@ -250,6 +250,7 @@ def register(mcp, helpers):
         try:
             resolve = helpers.get_resolve(ctx)
             ok = resolve._dbus.delete_timeline_clip(clip_id)
+            helpers.invalidate_cache("get_all_clip_ids")
             if not ok:
                 return f"ERROR: Could not delete clip {clip_id}"
             return f"Deleted clip {clip_id}"
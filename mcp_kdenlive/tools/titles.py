@@ -240,6 +240,7 @@ def register(mcp, helpers):
             # Create title clip in bin
             clip_name = text[:30].replace("\n", " ")
             bin_id = dbus.create_title_clip(title_xml, duration, clip_name)
+            helpers.invalidate_cache("get_all_clip_ids")
             if not bin_id or bin_id == "-1":
                 return "ERROR: Failed to create title clip in bin"
 
@@ -247,7 +248,7 @@ def register(mcp, helpers):
             time.sleep(0.3)  # D-Bus async settle
 
             # Insert on timeline
-            clip_id = dbus.insert_clip(bin_id, track_id, position)
+            clip_id, _ = helpers.insert_clip(dbus, bin_id, track_id, position)
             if clip_id < 0:
                 return f"ERROR: Title created (bin {bin_id}) but insert failed"
 
@@ -404,13 +405,14 @@ def register(mcp, helpers):
                 title_xml = _build_title_xml(w, h, 0, y, text, s)
                 clip_name = text[:30].replace("\n", " ")
                 bin_id = dbus.create_title_clip(title_xml, duration, clip_name)
+                helpers.invalidate_cache("get_all_clip_ids")
                 if not bin_id or bin_id == "-1":
                     errors += 1
                     continue
 
                 time.sleep(0.15)  # D-Bus settle
 
-                cid = dbus.insert_clip(bin_id, track_id, start)
+                cid, _ = helpers.insert_clip(dbus, bin_id, track_id, start)
                 if cid < 0:
                     errors += 1
                     continue
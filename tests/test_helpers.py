@@ -0,0 +1,298 @@
+"""Unit tests for mcp_kdenlive.helpers: D-Bus call helpers, caches, timecodes."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mcp_kdenlive import helpers  # noqa: E402
+
+
+class FakeDBus:
+    """Records every method call; a call fails (returns False) if its first arg is in fail_on.
+
+    Optional kdenlive_api methods (execute_batch) are absent unless set on the instance.
+    """
+
+    def __init__(self, fail_on=()):
+        self.calls = []
+        self.fail_on = set(fail_on)
+
+    def __getattr__(self, name):
+        if name == "execute_batch":
+            raise AttributeError(name)
+
+        def method(*args):
+            self.calls.append((name, args))
+            return not (args and args[0] in self.fail_on)
+        return method
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_call_dbus_outside_batch_calls_immediately(self):
+        dbus = FakeDBus()
+        self.assertTrue(helpers.call_dbus(dbus, "set_x", 1, 2))
+        self.assertEqual(dbus.calls, [("set_x", (1, 2))])
+
+    def test_batch_queues_until_exit_and_keeps_order(self):
+        dbus = FakeDBus()
+        with helpers.batch(dbus):
+            helpers.call_dbus(dbus, "set_a", 1)
+            helpers.call_dbus(dbus, "set_b", 2)
+            self.assertEqual(dbus.calls, [])
+        self.assertEqual(dbus.calls, [("set_a", (1,)), ("set_b", (2,))])
+
+    def test_batch_uses_execute_batch_when_available(self):
+        dbus = FakeDBus()
+        dbus.execute_batch = mock.Mock(return_value=[True, True])
+        with helpers.batch(dbus):
+            helpers.call_dbus(dbus, "set_a", 1)
+            helpers.call_dbus(dbus, "set_b", 2)
+        dbus.execute_batch.assert_called_once_with([("set_a", (1,)), ("set_b", (2,))])
+        self.assertEqual(dbus.calls, [])
+
+    def test_batch_reports_failed_calls(self):
+        dbus = FakeDBus(fail_on={7})
+        with self.assertRaises(RuntimeError) as cm:
+            with helpers.batch(dbus):
+                helpers.call_dbus(dbus, "set_ok", 1)
+                helpers.call_dbus(dbus, "set_bad", 7)
+        self.assertIn("set_bad", str(cm.exception))
+        self.assertNotIn("set_ok", str(cm.exception))
+
+    def test_nested_batch_joins_outer(self):
+        dbus = FakeDBus()
+        with helpers.batch(dbus):
+            with helpers.batch(dbus):
+                helpers.call_dbus(dbus, "set_a", 1)
+            self.assertEqual(dbus.calls, [])
+        self.assertEqual(dbus.calls, [("set_a", (1,))])
+
+
+class TestUndoGroup(unittest.TestCase):
+
+    def test_wraps_block_in_begin_end(self):
+        dbus = FakeDBus()
+        with helpers.undo_group(dbus, "Edit"):
+            dbus.set_a(1)
+        self.assertEqual([c[0] for c in dbus.calls],
+                         ["begin_undo_group", "set_a", "end_undo_group"])
+
+    def test_ends_group_on_error(self):
+        dbus = FakeDBus()
+        with self.assertRaises(ValueError):
+            with helpers.undo_group(dbus, "Edit"):
+                raise ValueError
+        self.assertEqual(dbus.calls[-1][0], "end_undo_group")
+
+
+class TestFirstTrackIds(unittest.TestCase):
+
+    def test_lowest_position_video_and_first_audio(self):
+        tracks = [
+            {"id": 5, "audio": "false", "position": 2},
+            {"id": 3, "audio": "true", "position": 0},
+            {"id": 9, "audio": False, "position": 1},
+            {"id": 4, "audio": True, "position": 3},
+        ]
+        self.assertEqual(helpers.first_track_ids(tracks), (9, 3))
+
+    def test_ties_go_to_lower_id_and_track_id_key_is_accepted(self):
+        tracks = [{"track_id": 8, "position": 0}, {"track_id": 6, "position": 0}]
+        self.assertEqual(helpers.first_track_ids(tracks), (6, None))
+
+    def test_empty(self):
+        self.assertEqual(helpers.first_track_ids([]), (None, None))
+
+
+class TestFormatTc(unittest.TestCase):
+
+    def setUp(self):
+        helpers._fmt_tc_cached.cache_clear()
+
+    def test_integral_fps(self):
+        self.assertEqual(helpers.format_tc(0, 25.0), "00:00:00:00")
+        self.assertEqual(helpers.format_tc(25 * 3661 + 7, 25.0), "01:01:01:07")
+
+    def _with_kdenlive_api(self, frames, fps):
+        """Format through a stand-in kdenlive_api.utils; return (result, mock)."""
+        utils = types.ModuleType("kdenlive_api.utils")
+        utils.frames_to_timecode = mock.Mock(return_value="tc")
+        modules = {"kdenlive_api": types.ModuleType("kdenlive_api"), "kdenlive_api.utils": utils}
+        with mock.patch.dict(sys.modules, modules):
+            return helpers.format_tc(frames, fps), utils.frames_to_timecode
+
+    def test_fractional_fps_uses_kdenlive_api(self):
+        result, frames_to_timecode = self._with_kdenlive_api(1800, 29.97)
+        self.assertEqual(result, "tc")
+        frames_to_timecode.assert_called_once_with(1800, 29.97)
+
+    def test_negative_frames_use_kdenlive_api(self):
+        result, frames_to_timecode = self._with_kdenlive_api(-10, 25.0)
+        self.assertEqual(result, "tc")
+        frames_to_timecode.assert_called_once_with(-10, 25.0)
+
+    def test_results_are_cached(self):
+        helpers.format_tc(50, 25.0)
+        helpers.format_tc(50, 25.0)
+        self.assertEqual(helpers._fmt_tc_cached.cache_info().hits, 1)
+
+
+class TestCachedDbus(unittest.TestCase):
+
+    def setUp(self):
+        helpers.invalidate_cache()
+        self.dbus = mock.Mock()
+        self.dbus.get_x.side_effect = [1, 2, 3]
+
+    def test_reuses_result_within_ttl(self):
+        self.assertEqual(helpers.cached_dbus(self.dbus, "get_x", 4), 1)
+        self.assertEqual(helpers.cached_dbus(self.dbus, "get_x", 4), 1)
+        self.assertEqual(self.dbus.get_x.call_count, 1)
+
+    def test_refetches_after_ttl(self):
+        helpers.cached_dbus(self.dbus, "get_x", 4, ttl=0.01)
+        time.sleep(0.02)
+        self.assertEqual(helpers.cached_dbus(self.dbus, "get_x", 4, ttl=0.01), 2)
+
+    def test_keys_include_args(self):
+        helpers.cached_dbus(self.dbus, "get_x", 4)
+        self.assertEqual(helpers.cached_dbus(self.dbus, "get_x", 5), 2)
+
+    def test_entries_are_per_connection(self):
+        other = mock.Mock()
+        other.get_x.return_value = 9
+        helpers.cached_dbus(self.dbus, "get_x", 4)
+        self.assertEqual(helpers.cached_dbus(other, "get_x", 4), 9)
+
+    def test_invalidate_one_entry(self):
+        helpers.cached_dbus(self.dbus, "get_x", 4)
+        helpers.invalidate_cache("get_x", 4)
+        self.assertEqual(helpers.cached_dbus(self.dbus, "get_x", 4), 2)
+
+    def test_invalidate_all(self):
+        helpers.cached_dbus(self.dbus, "get_x", 4)
+        helpers.invalidate_cache()
+        self.assertEqual(helpers.cached_dbus(self.dbus, "get_x", 4), 2)
+
+
+class TestInsertClip(unittest.TestCase):
+
+    def test_tuple_result(self):
+        dbus = mock.Mock()
+        dbus.insert_clip.return_value = (12, "125")
+        self.assertEqual(helpers.insert_clip(dbus, "3", 1, 0), (12, 125))
+
+    def test_plain_id_result(self):
+        dbus = mock.Mock()
+        dbus.insert_clip.return_value = -1
+        self.assertEqual(helpers.insert_clip(dbus, "3", 1, 0), (-1, None))
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances monotonic() instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SlowBin:
+    """Bin without add_project_clip; ids of paths in late only appear when released."""
+
+    def __init__(self, late=()):
+        self.ids = {"1"}
+        self.late = set(late)
+        self.pending = []
+
+    def get_all_clip_ids(self):
+        return list(self.ids)
+
+    def _call(self, method, path):
+        new_id = str(len(self.ids) + len(self.pending) + 1)
+        if path in self.late:
+            self.pending.append(new_id)
+        else:
+            self.ids.add(new_id)
+
+    def release(self):
+        self.ids.update(self.pending)
+        self.pending.clear()
+
+
+class TestImportClip(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(helpers, "time", FakeClock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_new_bin_id(self):
+        self.assertEqual(helpers.import_clip(SlowBin(), "a.mp4"), "2")
+
+    def test_late_id_is_not_given_to_next_file(self):
+        dbus = SlowBin(late={"a.mp4"})
+        self.assertIsNone(helpers.import_clip(dbus, "a.mp4"))
+        dbus.release()  # a.mp4's clip shows up after its poll timed out
+        self.assertEqual(helpers.import_clip(dbus, "b.mp4"), "3")
+
+    def test_uses_add_project_clip_when_available(self):
+        dbus = mock.Mock()
+        dbus.add_project_clip.return_value = ""
+        self.assertIsNone(helpers.import_clip(dbus, "a.mp4"))
+        dbus.add_project_clip.assert_called_once_with("a.mp4")
+
+
+class TestSafeTool(unittest.TestCase):
+
+    def test_sync(self):
+        @helpers.safe_tool
+        def tool(x: int) -> str:
+            """Doc."""
+            if x < 0:
+                raise ValueError("negative")
+            return f"ok {x}"
+
+        self.assertEqual(tool(1), "ok 1")
+        self.assertEqual(tool(-1), "ERROR: negative")
+        self.assertEqual(tool.__doc__, "Doc.")
+        self.assertEqual(tool.__name__, "tool")
+
+    def test_async(self):
+        @helpers.safe_tool
+        async def tool(x: int) -> str:
+            if x < 0:
+                raise ValueError("negative")
+            return f"ok {x}"
+
+        self.assertTrue(asyncio.iscoroutinefunction(tool))
+        self.assertEqual(asyncio.run(tool(2)), "ok 2")
+        self.assertEqual(asyncio.run(tool(-1)), "ERROR: negative")
+
+    def test_in_thread_runs_whole_body_off_the_loop_thread(self):
+        @helpers.safe_tool
+        @helpers.in_thread
+        def tool(x: int) -> str:
+            if x < 0:
+                raise ValueError("negative")
+            return threading.current_thread().name
+
+        self.assertTrue(asyncio.iscoroutinefunction(tool))
+        self.assertNotEqual(asyncio.run(tool(1)), threading.current_thread().name)
+        self.assertEqual(asyncio.run(tool(-1)), "ERROR: negative")
+
+
+if __name__ == "__main__":
+    unittest.main()
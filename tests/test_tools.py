@@ -0,0 +1,221 @@
+"""Unit tests for tool modules, run against a fake kdenlive_api D-Bus client."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mcp_kdenlive import helpers  # noqa: E402
+from mcp_kdenlive.tools import composite, effects, keyframes  # noqa: E402
+
+
+class FakeMCP:
+    """Collects the functions registered with @mcp.tool()."""
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self):
+        def decorator(fn):
+            self.tools[fn.__name__] = fn
+            return fn
+        return decorator
+
+
+class FakeDBus:
+    """Single-call kdenlive_api client: records calls, every call succeeds."""
+
+    def __init__(self):
+        self.calls = []
+
+    def _record(self, name, *args):
+        self.calls.append((name, args))
+        return True
+
+    def begin_undo_group(self, name):
+        return self._record("begin_undo_group", name)
+
+    def end_undo_group(self):
+        return self._record("end_undo_group")
+
+    def add_effect_keyframe(self, *args):
+        return self._record("add_effect_keyframe", *args)
+
+    def set_clip_transform(self, *args):
+        return self._record("set_clip_transform", *args)
+
+
+class BulkDBus(FakeDBus):
+    """Client of a kdenlive_api with the bulk keyframe calls."""
+
+    def add_effect_keyframes_bulk(self, *args):
+        return self._record("add_effect_keyframes_bulk", *args)
+
+    def set_clip_transform_bulk(self, *args):
+        return self._record("set_clip_transform_bulk", *args)
+
+
+class KeyframeToolsTest(unittest.TestCase):
+
+    def setUp(self):
+        mcp = FakeMCP()
+        keyframes.register(mcp, helpers)
+        self.tools = mcp.tools
+
+    def _run(self, dbus, tool, *args):
+        with mock.patch.object(helpers, "get_dbus", return_value=dbus):
+            return self.tools[tool](None, *args)
+
+    def test_add_keyframes_bulk_call(self):
+        dbus = BulkDBus()
+        out = self._run(dbus, "add_effect_keyframes_bulk", 7,
+                        [[0, 0.0, "linear"], [25, 1.0, "smooth"]], 1)
+        self.assertEqual(dbus.calls, [("add_effect_keyframes_bulk",
+                                       (7, 1, [0, 25], [0.0, 1.0], [0, 3]))])
+        self.assertIn("Added 2 keyframe(s)", out)
+
+    def test_add_keyframes_fallback_is_one_undo_group(self):
+        dbus = FakeDBus()
+        out = self._run(dbus, "add_effect_keyframes_bulk", 7,
+                        [[0, 0.0, "linear"], [25, 1.0, "smooth"]])
+        self.assertEqual(dbus.calls, [
+            ("begin_undo_group", ("Add keyframes",)),
+            ("add_effect_keyframe", (7, 0, 0, 0.0, 0)),
+            ("add_effect_keyframe", (7, 0, 25, 1.0, 3)),
+            ("end_undo_group", ()),
+        ])
+        self.assertIn("Added 2 keyframe(s)", out)
+
+    def test_add_keyframes_rejects_unknown_type(self):
+        dbus = FakeDBus()
+        out = self._run(dbus, "add_effect_keyframes_bulk", 7, [[0, 0.0, "wobbly"]])
+        self.assertTrue(out.startswith("ERROR: Unknown keyframe_type"))
+        self.assertEqual(dbus.calls, [])
+
+    def test_add_keyframes_fallback_reports_failure(self):
+        dbus = FakeDBus()
+        dbus.add_effect_keyframe = lambda *args: False
+        out = self._run(dbus, "add_effect_keyframes_bulk", 7, [[0, 0.0, "linear"]])
+        self.assertIn("add_effect_keyframe", out)
+        self.assertTrue(out.startswith("ERROR:"))
+
+    def test_set_transform_bulk_call(self):
+        dbus = BulkDBus()
+        out = self._run(dbus, "set_clip_transform_bulk", 3,
+                        [[0, 0, 0, 1920, 1080, 1.0], [50, 480, 270, 960, 540, 0.5]])
+        self.assertEqual(dbus.calls, [("set_clip_transform_bulk", (
+            3, [0, 50], [(0, 0, 1920, 1080), (480, 270, 960, 540)], [1.0, 0.5]))])
+        self.assertIn("Set 2 transform keyframe(s)", out)
+
+    def test_set_transform_fallback_is_one_undo_group(self):
+        dbus = FakeDBus()
+        self._run(dbus, "set_clip_transform_bulk", 3,
+                  [[0, 0, 0, 1920, 1080, 1.0], [50, 480, 270, 960, 540, 0.5]])
+        self.assertEqual(dbus.calls, [
+            ("begin_undo_group", ("Set transform",)),
+            ("set_clip_transform", (3, 0, 0, 0, 1920, 1080, 1.0)),
+            ("set_clip_transform", (3, 50, 480, 270, 960, 540, 0.5)),
+            ("end_undo_group", ()),
+        ])
+
+    def test_set_transform_rejects_int32_overflow(self):
+        dbus = BulkDBus()
+        out = self._run(dbus, "set_clip_transform_bulk", 3, [[0, 0, 0, 2**31, 1080, 1.0]])
+        self.assertTrue(out.startswith("ERROR: rect_max out of int32 range"))
+        self.assertEqual(dbus.calls, [])
+
+
+class PasteDBus(FakeDBus):
+    """Copy/paste effect client; pastes onto clip ids in fail_on fail."""
+
+    def __init__(self, fail_on=()):
+        super().__init__()
+        self.fail_on = set(fail_on)
+
+    def copy_clip_effects(self, clip_id):
+        self._record("copy_clip_effects", clip_id)
+        return "<effects/>"
+
+    def paste_clip_effects(self, clip_id, xml):
+        self._record("paste_clip_effects", clip_id, xml)
+        return clip_id not in self.fail_on
+
+
+class PasteEffectsTest(unittest.TestCase):
+
+    def setUp(self):
+        mcp = FakeMCP()
+        effects.register(mcp, helpers)
+        self.paste = mcp.tools["paste_effects_to_many"]
+
+    def _run(self, dbus, *args):
+        with mock.patch.object(helpers, "get_dbus", return_value=dbus):
+            return self.paste(None, *args)
+
+    def test_copies_once_and_pastes_in_one_undo_group(self):
+        dbus = PasteDBus()
+        out = self._run(dbus, 1, [2, 3])
+        self.assertEqual(dbus.calls, [
+            ("copy_clip_effects", (1,)),
+            ("begin_undo_group", ("Paste effects",)),
+            ("paste_clip_effects", (2, "<effects/>")),
+            ("paste_clip_effects", (3, "<effects/>")),
+            ("end_undo_group", ()),
+        ])
+        self.assertEqual(out, "Pasted effects from clip 1 onto 2 clip(s)")
+
+    def test_partial_failure_names_failed_targets(self):
+        dbus = PasteDBus(fail_on={3, 5})
+        out = self._run(dbus, 1, [2, 3, 4, 5])
+        self.assertEqual(out, "ERROR: Could not paste effects onto clip(s) 3, 5; "
+                              "pasted onto 2 of 4 clip(s)")
+
+    def test_uses_execute_batch_results(self):
+        dbus = PasteDBus()
+        dbus.execute_batch = mock.Mock(return_value=[True, False])
+        out = self._run(dbus, 1, [2, 3])
+        dbus.execute_batch.assert_called_once_with([
+            ("paste_clip_effects", (2, "<effects/>")),
+            ("paste_clip_effects", (3, "<effects/>")),
+        ])
+        self.assertIn("onto clip(s) 3;", out)
+
+
+class MatchFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        for name in ("b.mp4", "a.mp4", ".hidden.mp4", "notes.txt", os.path.join("sub", "c.mp4")):
+            path = os.path.join(self.dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+        os.mkdir(os.path.join(self.dir, "dir.mp4"))
+
+    def test_sorted_files_only_without_dotfiles(self):
+        self.assertEqual(composite._match_files(self.dir, "*.mp4"), [
+            ("a.mp4", os.path.join(self.dir, "a.mp4")),
+            ("b.mp4", os.path.join(self.dir, "b.mp4")),
+        ])
+
+    def test_dot_pattern_matches_dotfiles(self):
+        self.assertEqual([n for n, _ in composite._match_files(self.dir, ".*.mp4")],
+                         [".hidden.mp4"])
+
+    def test_separator_pattern_uses_glob(self):
+        self.assertEqual(composite._match_files(self.dir, "sub/*.mp4"),
+                         [("c.mp4", os.path.join(self.dir, "sub", "c.mp4"))])
+
+    def test_no_match(self):
+        self.assertEqual(composite._match_files(self.dir, "*.mov"), [])
+
+    def test_missing_directory_matches_nothing(self):
+        self.assertEqual(composite._match_files(os.path.join(self.dir, "gone"), "*.mp4"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()